@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import json
 import os
 import re
-from typing import Any, Dict, List, Optional
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import chess
 
@@ -19,9 +24,9 @@ from . import chess_engine
 # Passed directly to create_agent(tools=[...])
 # ============================================================
 
-# Tool-call context is stored in module globals for simplicity (single-session).
-# This allows tools to access the current request's board/state without extra services.
-_TOOL_CTX: Dict[str, Any] = {}
+# Tool-call context lives in a ContextVar so concurrent sessions don't see each other's board.
+# LangChain runs tools in context-copying executors, so the value set by the caller reaches them.
+_TOOL_CTX: ContextVar[Dict[str, Any]] = ContextVar("coach_tool_ctx")
 
 
 def _set_tool_ctx(
@@ -33,8 +38,7 @@ def _set_tool_ctx(
     coach_verbosity: int,
     signals: Dict[str, Any],
 ):
-    _TOOL_CTX.clear()
-    _TOOL_CTX.update(
+    _TOOL_CTX.set(
         {
             "board": board,
             "move_list": move_list,
@@ -46,35 +50,44 @@ def _set_tool_ctx(
     )
 
 
+# The FEN carries the full position; the LLM only needs recent moves for context
+_RECENT_MOVES = 16
+
+
 def get_current_game_state() -> str:
     """
     Get the current game state for the agent.
 
     Returns a compact, engine-independent snapshot:
     - FEN
-    - move_list (UCI strings)
+    - total number of half-moves played
+    - the most recent moves (UCI strings, up to 16 half-moves)
     - player_side
     - bot_difficulty
     - coach_verbosity
     - mental signals (think times, blunder streak, undo attempts, rapid_after_blunder, self_report)
     """
-    board: chess.Board = _TOOL_CTX["board"]
+    ctx = _TOOL_CTX.get()
+    board: chess.Board = ctx["board"]
+    move_list: List[str] = ctx["move_list"]
     return (
         f"FEN: {board.fen()}\n"
-        f"MoveList(UCI): {_TOOL_CTX['move_list']}\n"
-        f"PlayerSide: {_TOOL_CTX['player_side']}\n"
-        f"BotDifficulty: {_TOOL_CTX['bot_difficulty']}\n"
-        f"CoachVerbosity: {_TOOL_CTX['coach_verbosity']}\n"
-        f"Signals: {_TOOL_CTX['signals']}\n"
+        f"TotalMoves: {len(move_list)}\n"
+        f"RecentMoves(UCI): {' '.join(move_list[-_RECENT_MOVES:])}\n"
+        f"PlayerSide: {ctx['player_side']}\n"
+        f"BotDifficulty: {ctx['bot_difficulty']}\n"
+        f"CoachVerbosity: {ctx['coach_verbosity']}\n"
+        f"Signals: {json.dumps(ctx['signals'], separators=(',', ':'))}\n"
     )
 
 
-def engine_analyze(multipv: int = 2, depth: int = 12) -> str:
+def engine_analyze(multipv: int = 1, depth: int = 12) -> str:
     """
     Run Stockfish analysis on the current position.
 
     Args:
-      multipv: number of principal variations to request
+      multipv: number of principal variations to request (the report shows one;
+        at 1 the bot's own search of this position can be reused)
       depth: search depth
 
     Returns:
@@ -83,7 +96,7 @@ def engine_analyze(multipv: int = 2, depth: int = 12) -> str:
     if chess_engine.ENGINE is None:
         return "ERROR: Engine not initialized"
 
-    board: chess.Board = _TOOL_CTX["board"]
+    board: chess.Board = _TOOL_CTX.get()["board"]
     info = chess_engine.ENGINE.analyze_position(board, depth=depth, multipv=multipv)
     lines = []
     for i, pv in enumerate(info.get("multipv", []), start=1):
@@ -173,35 +186,62 @@ Next-turn checklist:
 # Parsing agent text -> structured JSON for UI tabs
 # ============================================================
 
-def _section(text: str, tag: str) -> str:
-    pattern = rf"\[{re.escape(tag)}\]\s*(.*?)(?=\n\[[A-Z_]+\]|\Z)"
-    m = re.search(pattern, text, flags=re.S)
-    return m.group(1).strip() if m else ""
+# Patterns are compiled once at import; parse_agent_report runs on every agent response.
+# Tags may carry markdown emphasis ("### [TAG]", "**[TAG]**", "[TAG]:"); \s* also eats a CRLF's \r
+_TAG_RE = re.compile(r"^[ \t#*]*\[([A-Z_]+)\][:*]*\s*$", re.M)
+_NUMBERED_RE = re.compile(r"^\d+\)\s+(.+)$")
+# Per-section label lines; group 1 is the canonical label, any suffix like "(4-8 ply max)" is skipped.
+# Markdown emphasis around the label ("**Why:**", "_Eval_:") is tolerated.
+_MENTAL_LABEL_RE = re.compile(
+    r"^[ \t]*[*_]*(Observed Signals|Inference|10s Micro-Reset Tip)[^:\n]*:[*_]*", re.M
+)
+_POS_LABEL_RE = re.compile(
+    r"^[ \t]*[*_]*(Eval|Why|Immediate Threats|Plans \(White\)|Plans \(Black\))[*_]*:[*_]*", re.M
+)
+_COACH_LABEL_RE = re.compile(r"^[ \t]*[*_]*(Actionable|Short PV)[^:\n]*:[*_]*", re.M)
+_LABEL_RE = re.compile(r"Label[*_]*:[*_]*\s*(.*)")
+_BULLET_MARK_RE = re.compile(r"^-\s+")
+
+
+def _split_labeled(text: str, header_re: re.Pattern) -> Dict[str, str]:
+    """
+    Split text into {label: body} in a single pass over the header matches.
+    A body runs until the next header; if a label repeats, the first occurrence wins.
+    """
+    headers = list(header_re.finditer(text))
+    parts: Dict[str, str] = {}
+    for i, m in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        parts.setdefault(m.group(1), text[m.end():end].strip())
+    return parts
+
+
+def _split_sections(text: str) -> Dict[str, str]:
+    """
+    Split the report into {tag: body} using the [TAG] header lines.
+    """
+    return _split_labeled(text, _TAG_RE)
 
 
 def _bullets(block: str) -> List[str]:
-    out = []
-    for line in block.splitlines():
-        line = line.strip()
-        if line.startswith("- "):
-            out.append(line[2:].strip())
-    return [b for b in out if b]
+    return [s[2:].strip() for s in map(str.strip, block.splitlines()) if s.startswith("- ") and len(s) > 2]
 
 
 def _numbered(block: str) -> List[str]:
-    out = []
-    for line in block.splitlines():
-        line = line.strip()
-        if re.match(r"^\d+\)\s+", line):
-            out.append(re.sub(r"^\d+\)\s+", "", line).strip())
-    return [b for b in out if b]
+    return [m.group(1) for line in block.splitlines() if (m := _NUMBERED_RE.match(line.strip()))]
+
+
+def _unbullet(value: str) -> str:
+    # Drop a "- " bullet marker only; a bare "-" is a sign (e.g. "Eval: -1.2")
+    return _BULLET_MARK_RE.sub("", value.strip()).strip()
 
 
 def parse_agent_report(text: str) -> AgentOutput:
-    mental = _section(text, "MENTAL_STATE_CHECK")
-    pos = _section(text, "POSITION_SNAPSHOT")
-    quality = _section(text, "MOVE_QUALITY")
-    coaching = _section(text, "COACHING")
+    sections = _split_sections(text)
+    mental = sections.get("MENTAL_STATE_CHECK", "")
+    pos = sections.get("POSITION_SNAPSHOT", "")
+    quality = sections.get("MOVE_QUALITY", "")
+    coaching = sections.get("COACHING", "")
 
     # --- Mental ---
     obs = []
@@ -209,20 +249,13 @@ def parse_agent_report(text: str) -> AgentOutput:
     tip = ""
 
     if mental:
-        # Observed Signals bullets
-        if "Observed Signals:" in mental:
-            after = mental.split("Observed Signals:", 1)[1]
-            # up to Inference
-            parts = re.split(r"\bInference", after, maxsplit=1)
-            obs = _bullets(parts[0])
-
-        m_inf = re.search(r"Inference.*?:\s*(.*?)(?=10s Micro-Reset Tip:|\Z)", mental, flags=re.S)
-        if m_inf:
-            inference = m_inf.group(1).strip().replace("\n", " ").strip("- ").strip()
-
-        m_tip = re.search(r"10s Micro-Reset Tip:\s*(.*)", mental, flags=re.S)
-        if m_tip:
-            tip = m_tip.group(1).strip().strip("- ").strip()
+        parts = _split_labeled(mental, _MENTAL_LABEL_RE)
+        if "Observed Signals" in parts:
+            obs = _bullets(parts["Observed Signals"])
+        if "Inference" in parts:
+            inference = _unbullet(parts["Inference"].replace("\n", " "))
+        if "10s Micro-Reset Tip" in parts:
+            tip = _unbullet(parts["10s Micro-Reset Tip"])
 
     # --- Position ---
     eval_line = ""
@@ -232,32 +265,19 @@ def parse_agent_report(text: str) -> AgentOutput:
     plans_black = []
 
     if pos:
-        m_eval = re.search(r"Eval:\s*(.*?)(?=\nWhy:|\Z)", pos, flags=re.S)
-        if m_eval:
-            eval_line = m_eval.group(1).strip().strip("- ").strip()
-
-        m_why = re.search(r"Why:\s*(.*?)(?=\nImmediate Threats:|\Z)", pos, flags=re.S)
-        if m_why:
-            why = _bullets(m_why.group(1))
-
-        m_thr = re.search(r"Immediate Threats:\s*(.*?)(?=\nPlans \(White\):|\Z)", pos, flags=re.S)
-        if m_thr:
-            threats = _bullets(m_thr.group(1))
-
-        m_pw = re.search(r"Plans \(White\):\s*(.*?)(?=\nPlans \(Black\):|\Z)", pos, flags=re.S)
-        if m_pw:
-            plans_white = _bullets(m_pw.group(1))
-
-        m_pb = re.search(r"Plans \(Black\):\s*(.*?)(?=\n|\Z)", pos, flags=re.S)
-        if m_pb:
-            plans_black = _bullets(m_pb.group(1))
+        parts = _split_labeled(pos, _POS_LABEL_RE)
+        eval_line = _unbullet(parts.get("Eval", ""))
+        why = _bullets(parts.get("Why", ""))
+        threats = _bullets(parts.get("Immediate Threats", ""))
+        plans_white = _bullets(parts.get("Plans (White)", ""))
+        plans_black = _bullets(parts.get("Plans (Black)", ""))
 
     # --- Move Quality ---
     label = "Good"
     if quality:
-        m_label = re.search(r"Label:\s*(.*)", quality)
+        m_label = _LABEL_RE.search(quality)
         if m_label:
-            label = m_label.group(1).strip().strip("- ").strip()
+            label = _unbullet(m_label.group(1))
             # normalize
             allowed = {"Best", "Good", "Inaccuracy", "Mistake", "Blunder"}
             if label not in allowed:
@@ -267,14 +287,11 @@ def parse_agent_report(text: str) -> AgentOutput:
     bullets = []
     pv = None
     if coaching:
-        m_act = re.search(r"Actionable:\s*(.*?)(?=\nShort PV|\Z)", coaching, flags=re.S)
-        if m_act:
-            bullets = _numbered(m_act.group(1))
-            if not bullets:
-                bullets = _bullets(m_act.group(1))
-        m_pv = re.search(r"Short PV.*?:\s*(.*)", coaching, flags=re.S)
-        if m_pv:
-            pv = m_pv.group(1).strip().strip("- ").strip()
+        parts = _split_labeled(coaching, _COACH_LABEL_RE)
+        if "Actionable" in parts:
+            bullets = _numbered(parts["Actionable"]) or _bullets(parts["Actionable"])
+        if "Short PV" in parts:
+            pv = _unbullet(parts["Short PV"])
 
     return AgentOutput(
         coach=CoachOutput(move_quality=label, bullets=bullets[:3], pv=pv),
@@ -297,7 +314,186 @@ def parse_agent_report(text: str) -> AgentOutput:
 # Main entry: run_coach_agent
 # ============================================================
 
-def run_coach_agent(
+_AGENT = None
+_AGENT_LOCK = threading.Lock()
+
+
+def _get_agent():
+    """
+    Build the LLM client + agent graph once and reuse it across requests.
+    Per-request data reaches the tools through _TOOL_CTX, so the graph itself is stateless.
+    """
+    global _AGENT
+    if _AGENT is None:
+        with _AGENT_LOCK:
+            if _AGENT is None:
+                llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
+
+                # You required this exact invocation pattern
+                _AGENT = create_agent(llm, TOOLS, system_prompt=SYSTEM_PROMPT)
+    return _AGENT
+
+
+# Input asks agent to call tools and produce the strict format
+_USER_INPUT = (
+    "Analyze the current game using tools. "
+    "Use the move history and mental signals to produce better coaching. "
+    "Return the strict sectioned report."
+)
+
+
+# Resolved once at import (config.py has already loaded .env by then)
+_HAS_OPENAI_KEY = bool(os.getenv("OPENAI_API_KEY"))
+
+# Graceful degradation: still return something parseable
+_DEGRADED_RAW = (
+    "[MENTAL_STATE_CHECK]\n"
+    "Observed Signals:\n"
+    "- OPENAI_API_KEY missing\n"
+    "Inference (non-medical, uncertain):\n"
+    "- Coaching disabled until key is set\n"
+    "10s Micro-Reset Tip:\n"
+    "- Set OPENAI_API_KEY and restart backend\n\n"
+    "[POSITION_SNAPSHOT]\n"
+    "Eval:\n- unknown\n"
+    "Why:\n- engine unavailable\n"
+    "Immediate Threats:\n- unknown\n"
+    "Plans (White):\n- develop pieces\n"
+    "Plans (Black):\n- develop pieces\n\n"
+    "[MOVE_QUALITY]\n"
+    "Label:\n- Good\n"
+    "Reason:\n- no engine eval available\n\n"
+    "[COACHING]\n"
+    "Actionable:\n"
+    "- 1) Set OPENAI_API_KEY\n"
+    "Short PV (4-8 ply max):\n"
+    "- \n\n"
+    "[BOT_MOVE]\n"
+    "Explain:\n- \n"
+    "Next-turn checklist:\n- \n"
+)
+
+
+# Returned when the agent's text can't be parsed; raw_text is swapped for the real output
+_FALLBACK_RAW = (
+    "[MENTAL_STATE_CHECK]\nObserved Signals:\n- parse failed\n"
+    "Inference (non-medical, uncertain):\n- parse failed\n"
+    "10s Micro-Reset Tip:\n- take a breath\n\n"
+    "[POSITION_SNAPSHOT]\nEval:\n- unknown\nWhy:\n- unknown\nImmediate Threats:\n- unknown\n"
+    "Plans (White):\n- unknown\nPlans (Black):\n- unknown\n\n"
+    "[MOVE_QUALITY]\nLabel:\n- Good\nReason:\n- unknown\n\n"
+    "[COACHING]\nActionable:\n- 1) See raw output\nShort PV (4-8 ply max):\n- \n\n"
+    "[BOT_MOVE]\nExplain:\n- \nNext-turn checklist:\n- \n"
+)
+
+# Both canned reports are constant, so parse them once; callers get shallow copies
+_DEGRADED_OUT = parse_agent_report(_DEGRADED_RAW)
+_FALLBACK_OUT = parse_agent_report(_FALLBACK_RAW)
+
+
+def fallback_report(raw_text: Optional[str] = None) -> AgentOutput:
+    """
+    Placeholder report for when the agent's output is unusable or the run failed.
+    """
+    return _FALLBACK_OUT.model_copy(update={"raw_text": raw_text})
+
+
+# ============================================================
+# Shortcuts: opening book + per-position report cache
+# ============================================================
+
+# Canned coaching for well-known opening positions, keyed by the space-joined UCI move list.
+# Only the coach/position tabs are stored; the mental tab is built from the live signals.
+_BOOK_MAX_PLY = 10
+_OPENING_BOOK: Dict[str, Tuple[CoachOutput, PositionOutput]] = {
+    moves: (CoachOutput.model_validate(entry["coach"]), PositionOutput.model_validate(entry["position"]))
+    for moves, entry in json.loads(Path(__file__).with_name("opening_book.json").read_text(encoding="utf-8")).items()
+}
+
+# Coach/position tabs of finished LLM reports keyed by (move history, player_side, coach_verbosity),
+# so undo/redo back into a position doesn't pay for another LLM round-trip. The history, not
+# the FEN, is the key: the move-quality label grades the last move and the coaching reads the
+# game so far, so a transposition into the same position must not reuse them. The mental tab
+# is never cached: it depends on the session's signals, not the game.
+_ReportKey = Tuple[Tuple[str, ...], str, int]
+_REPORT_CACHE: OrderedDict[_ReportKey, Tuple[CoachOutput, PositionOutput]] = OrderedDict()
+_REPORT_CACHE_MAXLEN = 256
+_REPORT_CACHE_LOCK = threading.Lock()
+
+
+def _observed_signal_lines(signals: Dict[str, Any]) -> List[str]:
+    lines = []
+    think_times = signals.get("think_times_ms") or []
+    if think_times:
+        lines.append(f"Last think time: {think_times[-1]} ms")
+    lines.append(f"Blunder streak: {signals.get('blunder_streak', 0)}")
+    lines.append(f"Undo attempts: {signals.get('undo_attempts', 0)}")
+    if signals.get("rapid_after_blunder"):
+        lines.append("Moved quickly right after a blunder")
+    if signals.get("self_report"):
+        lines.append(f"Self-report: {signals['self_report']}")
+    return lines
+
+
+def _shortcut_report(
+    coach: CoachOutput,
+    position: PositionOutput,
+    signals: Dict[str, Any],
+    inference: str,
+) -> AgentOutput:
+    # Stored coach/position tabs plus a mental tab built from the live signals
+    return AgentOutput(
+        coach=coach,
+        mental=MentalOutput(
+            observed_signals=_observed_signal_lines(signals),
+            inference=inference,
+            micro_reset_tip="Before each move, ask what your opponent's last move attacks.",
+        ),
+        position=position,
+    )
+
+
+def _book_report(move_list: List[str], signals: Dict[str, Any]) -> Optional[AgentOutput]:
+    if len(move_list) > _BOOK_MAX_PLY:
+        return None
+    entry = _OPENING_BOOK.get(" ".join(move_list))
+    if entry is None:
+        return None
+    return _shortcut_report(
+        *entry, signals, inference="Early game; too little data to read much from the signals yet."
+    )
+
+
+def _report_key(move_list: List[str], player_side: str, coach_verbosity: int) -> _ReportKey:
+    return (tuple(move_list), player_side, coach_verbosity)
+
+
+def _cached_report(key: _ReportKey, signals: Dict[str, Any]) -> Optional[AgentOutput]:
+    with _REPORT_CACHE_LOCK:
+        entry = _REPORT_CACHE.get(key)
+        if entry is None:
+            return None
+        _REPORT_CACHE.move_to_end(key)
+    return _shortcut_report(
+        *entry, signals, inference="Position coached before; no fresh read of the signals this time."
+    )
+
+
+def _parse_or_fallback(text: str, cache_key: _ReportKey) -> AgentOutput:
+    try:
+        out = parse_agent_report(text)
+    except Exception:
+        # Fallback: return raw text in all fields (never cached)
+        return fallback_report(text)
+
+    with _REPORT_CACHE_LOCK:
+        _REPORT_CACHE[cache_key] = (out.coach, out.position)
+        if len(_REPORT_CACHE) > _REPORT_CACHE_MAXLEN:
+            _REPORT_CACHE.popitem(last=False)
+    return out
+
+
+def _shortcut_or_prepare(
     *,
     board: chess.Board,
     move_list: List[str],
@@ -305,42 +501,26 @@ def run_coach_agent(
     bot_difficulty: str,
     coach_verbosity: int,
     signals: Dict[str, Any],
-) -> AgentOutput:
+) -> Tuple[Optional[AgentOutput], _ReportKey]:
     """
-    Run the agent after a move. Must be engine-grounded.
+    Shared front half of run_coach_agent/stream_coach_agent.
 
-    Inputs include full move history + signals so the agent can use prior moves
-    (blunder streak, think time, rapid after blunder) in a non-medical inference.
+    Returns (report, cache_key). The report is set when the opening book, the
+    missing-key fallback or the report cache can answer without the LLM; otherwise
+    it is None and the tool context is set up for an agent run.
     """
-    if not os.getenv("OPENAI_API_KEY"):
-        # Graceful degradation: still return something parseable
-        raw = (
-            "[MENTAL_STATE_CHECK]\n"
-            "Observed Signals:\n"
-            "- OPENAI_API_KEY missing\n"
-            "Inference (non-medical, uncertain):\n"
-            "- Coaching disabled until key is set\n"
-            "10s Micro-Reset Tip:\n"
-            "- Set OPENAI_API_KEY and restart backend\n\n"
-            "[POSITION_SNAPSHOT]\n"
-            "Eval:\n- unknown\n"
-            "Why:\n- engine unavailable\n"
-            "Immediate Threats:\n- unknown\n"
-            "Plans (White):\n- develop pieces\n"
-            "Plans (Black):\n- develop pieces\n\n"
-            "[MOVE_QUALITY]\n"
-            "Label:\n- Good\n"
-            "Reason:\n- no engine eval available\n\n"
-            "[COACHING]\n"
-            "Actionable:\n"
-            "- 1) Set OPENAI_API_KEY\n"
-            "Short PV (4-8 ply max):\n"
-            "- \n\n"
-            "[BOT_MOVE]\n"
-            "Explain:\n- \n"
-            "Next-turn checklist:\n- \n"
-        )
-        return parse_agent_report(raw)
+    cache_key = _report_key(move_list, player_side, coach_verbosity)
+
+    book = _book_report(move_list, signals)
+    if book is not None:
+        return book, cache_key
+
+    if not _HAS_OPENAI_KEY:
+        return _DEGRADED_OUT.model_copy(), cache_key
+
+    cached = _cached_report(cache_key, signals)
+    if cached is not None:
+        return cached, cache_key
 
     # Set tool context for this invocation
     _set_tool_ctx(
@@ -351,20 +531,39 @@ def run_coach_agent(
         coach_verbosity=coach_verbosity,
         signals=signals,
     )
+    return None, cache_key
 
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
 
-    # You required this exact invocation pattern
-    agent = create_agent(llm, TOOLS, system_prompt=SYSTEM_PROMPT)
+def run_coach_agent(
+    *,
+    board: chess.Board,
+    move_list: List[str],
+    player_side: str,
+    bot_difficulty: str,
+    coach_verbosity: int,
+    signals: Dict[str, Any],
+) -> AgentOutput:
+    """
+    Run the agent after a move. Must be engine-grounded.
+
+    Inputs include full move history + signals so the agent can use prior moves
+    (blunder streak, think time, rapid after blunder) in a non-medical inference.
 
-    # Input asks agent to call tools and produce the strict format
-    user_input = (
-        "Analyze the current game using tools. "
-        "Use the move history and mental signals to produce better coaching. "
-        "Return the strict sectioned report."
+    Book openings and positions already coached (same move history/side/verbosity) are
+    answered without calling the LLM.
+    """
+    out, cache_key = _shortcut_or_prepare(
+        board=board,
+        move_list=move_list,
+        player_side=player_side,
+        bot_difficulty=bot_difficulty,
+        coach_verbosity=coach_verbosity,
+        signals=signals,
     )
+    if out is not None:
+        return out
 
-    result = agent.invoke({"input": user_input})
+    result = _get_agent().invoke({"input": _USER_INPUT})
 
     # LangChain returns a messages list; last message is the model output
     try:
@@ -372,20 +571,46 @@ def run_coach_agent(
     except Exception:
         text = str(result)
 
-    try:
-        return parse_agent_report(text)
-    except Exception:
-        # Fallback: return raw text in all fields
-        fallback = (
-            "[MENTAL_STATE_CHECK]\nObserved Signals:\n- parse failed\n"
-            "Inference (non-medical, uncertain):\n- parse failed\n"
-            "10s Micro-Reset Tip:\n- take a breath\n\n"
-            "[POSITION_SNAPSHOT]\nEval:\n- unknown\nWhy:\n- unknown\nImmediate Threats:\n- unknown\n"
-            "Plans (White):\n- unknown\nPlans (Black):\n- unknown\n\n"
-            "[MOVE_QUALITY]\nLabel:\n- Good\nReason:\n- unknown\n\n"
-            "[COACHING]\nActionable:\n- 1) See raw output\nShort PV (4-8 ply max):\n- \n\n"
-            "[BOT_MOVE]\nExplain:\n- \nNext-turn checklist:\n- \n"
-        )
-        out = parse_agent_report(fallback)
-        out.raw_text = text
+    return _parse_or_fallback(text, cache_key)
+
+
+def stream_coach_agent(
+    *,
+    board: chess.Board,
+    move_list: List[str],
+    player_side: str,
+    bot_difficulty: str,
+    coach_verbosity: int,
+    signals: Dict[str, Any],
+    on_delta: Callable[[str], None],
+) -> AgentOutput:
+    """
+    Same as run_coach_agent, but model text is passed to on_delta as it is generated.
+    The final report is parsed once, after the stream ends. Shortcut answers
+    (book/cache) are returned without any deltas.
+    """
+    out, cache_key = _shortcut_or_prepare(
+        board=board,
+        move_list=move_list,
+        player_side=player_side,
+        bot_difficulty=bot_difficulty,
+        coach_verbosity=coach_verbosity,
+        signals=signals,
+    )
+    if out is not None:
         return out
+
+    # The model may speak in several turns (around tool calls); the report is the last message
+    texts: Dict[Any, str] = {}
+    last_id = None
+    for chunk, meta in _get_agent().stream({"input": _USER_INPUT}, stream_mode="messages"):
+        if meta.get("langgraph_node") != "model":
+            continue
+        delta = chunk.text
+        if not delta:
+            continue
+        texts[chunk.id] = texts.get(chunk.id, "") + delta
+        last_id = chunk.id
+        on_delta(delta)
+
+    return _parse_or_fallback(texts.get(last_id, ""), cache_key)
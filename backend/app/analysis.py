@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 
 @dataclass(frozen=True)
@@ -13,6 +13,10 @@ class MoveQuality:
     swing_cp: Optional[int] = None
 
 
+# Ordered by severity; indexed by how many swing thresholds (-30, -90, -200) a move crosses
+_QUALITY_LABELS = ("Good", "Inaccuracy", "Mistake", "Blunder")
+
+
 def classify_move_quality_from_swing(
     eval_before_cp: Optional[int],
     eval_after_cp: Optional[int],
@@ -41,18 +45,26 @@ def classify_move_quality_from_swing(
         return MoveQuality(label="Good", swing_cp=None)
 
     swing = eval_after_cp - eval_before_cp  # negative is worse
-    # Use absolute negative swing as "mistake magnitude"
-    if swing >= -30:
-        # If very small swing, call it Good; you can map exact 0 to Best if you want
-        return MoveQuality(label="Good", swing_cp=swing)
+    # Each threshold crossed moves one label further along _QUALITY_LABELS
+    idx = (swing < -30) + (swing < -90) + (swing < -200)
+    return MoveQuality(label=_QUALITY_LABELS[idx], swing_cp=swing)
+
 
-    if -90 <= swing <= -31:
-        return MoveQuality(label="Inaccuracy", swing_cp=swing)
+def classify_move_qualities(
+    evals_before_cp: Sequence[Optional[int]],
+    evals_after_cp: Sequence[Optional[int]],
+) -> List[MoveQuality]:
+    """
+    Batch variant of classify_move_quality_from_swing for a whole move list
+    (e.g. a post-game summary), applied pairwise.
+    """
+    if len(evals_before_cp) != len(evals_after_cp):
+        raise ValueError("evals_before_cp and evals_after_cp must have the same length")
+    return list(map(classify_move_quality_from_swing, evals_before_cp, evals_after_cp))
 
-    if -200 <= swing <= -91:
-        return MoveQuality(label="Mistake", swing_cp=swing)
 
-    return MoveQuality(label="Blunder", swing_cp=swing)
+_STREAK_BAD = frozenset(("Blunder", "Mistake"))
+_STREAK_RESET = frozenset(("Good", "Best", "Inaccuracy"))
 
 
 def update_mental_signals_after_move(
@@ -88,12 +100,11 @@ def update_mental_signals_after_move(
     if move_quality is None:
         return current_blunder_streak, rapid
 
-    q = move_quality.strip()
-
-    if q in ("Blunder", "Mistake"):
+    # Labels come from our own normalized classifier/parser, so no stripping needed
+    if move_quality in _STREAK_BAD:
         return current_blunder_streak + 1, rapid
 
-    if q in ("Good", "Best", "Inaccuracy"):
+    if move_quality in _STREAK_RESET:
         return 0, rapid
 
     # Fallback: don't change
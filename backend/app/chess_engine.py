@@ -1,22 +1,43 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Tuple
+
 import chess
 import chess.engine
-from typing import Dict, Any
 
-from .config import find_stockfish_binary
+from .config import find_stockfish_binary, settings
 
 
 class StockfishEngine:
     """
-    Thin wrapper around python-chess UCI engine.
+    Thin wrapper around a small pool of python-chess UCI engines.
 
     Used for BOTH:
     - bot move selection
     - engine-grounded analysis (eval, PV, multipv)
+
+    Each call checks out an idle engine, so concurrent requests search on
+    separate Stockfish processes instead of queueing on one.
     """
 
-    def __init__(self):
+    def __init__(self, pool_size: int | None = None):
         engine_path = find_stockfish_binary()
-        self.engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+        size = max(1, pool_size or settings.STOCKFISH_POOL_SIZE)
+        threads = max(1, (os.cpu_count() or 1) // size)
+
+        self.pool: List[chess.engine.SimpleEngine] = []
+        self.pool_q: "queue.Queue[chess.engine.SimpleEngine]" = queue.Queue()
+        for _ in range(size):
+            engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+            engine.configure({"Threads": threads, "Hash": 256})
+            self.pool.append(engine)
+            self.pool_q.put(engine)
+
+        # Guards the caches below; engine calls themselves run outside the lock
+        self._lock = threading.Lock()
 
         # Default depths by difficulty
         self.depth_by_level = {
@@ -25,58 +46,122 @@ class StockfishEngine:
             "hard": 15,
         }
 
+        # Search info from the latest bot move, keyed by the FEN it leads to
+        self._last_info_by_fen: Dict[str, Dict[str, Any]] = {}
+
+        # LRU of finished analyses; eval at a fixed depth/multipv never changes for a FEN
+        self._cache: OrderedDict[Tuple[str, int, int], Dict[str, Any]] = OrderedDict()
+        self._cache_maxlen = 4096
+
+    @contextmanager
+    def _checkout(self) -> Iterator[chess.engine.SimpleEngine]:
+        engine = self.pool_q.get()
+        try:
+            yield engine
+        finally:
+            self.pool_q.put(engine)
+
     def get_bot_move(self, board: chess.Board, difficulty: str) -> chess.Move:
         depth = self.depth_by_level.get(difficulty, 10)
         limit = chess.engine.Limit(depth=depth)
-        result = self.engine.play(board, limit)
+        with self._checkout() as engine:
+            result = engine.play(board, limit, info=chess.engine.INFO_ALL)
+        self._remember_reply_info(board, result)
         return result.move
 
+    def _remember_reply_info(self, board: chess.Board, result: chess.engine.PlayResult) -> None:
+        """
+        Keep the search info from the bot move so the coach's follow-up analysis
+        of the resulting position can reuse it instead of searching again.
+
+        The bot's PV starts with its own move, so the tail of the PV (one ply
+        shallower) is the analysis of the position after that move.
+        """
+        info = result.info
+        if result.move is None or "score" not in info or "depth" not in info:
+            with self._lock:
+                self._last_info_by_fen.clear()
+            return
+
+        after = board.copy(stack=False)
+        after.push(result.move)
+        entry = dict(info)
+        entry["pv"] = list(info.get("pv", []))[1:]
+        parsed = self._parse_info(entry, after)
+        with self._lock:
+            self._last_info_by_fen.clear()
+            self._last_info_by_fen[after.fen()] = {
+                "depth": info["depth"] - 1,
+                "result": {"primary": parsed, "multipv": [parsed]},
+            }
+
+    @staticmethod
+    def _parse_info(entry, board: chess.Board) -> Dict[str, Any]:
+        score = entry["score"].pov(board.turn)
+        if score.is_mate():
+            eval_str = f"mate {score.mate()}"
+            eval_cp = None
+        else:
+            eval_cp = score.score()
+            eval_str = f"{eval_cp} cp"
+
+        pv_moves = []
+        if "pv" in entry:
+            pv_moves = [m.uci() for m in entry["pv"][:8]]
+
+        return {
+            "eval_str": eval_str,
+            "eval_cp": eval_cp,
+            "pv": pv_moves,
+        }
+
     def analyze_position(
         self,
         board: chess.Board,
         depth: int = 12,
         multipv: int = 1,
     ) -> Dict[str, Any]:
+        fen = board.fen()
+        key = (fen, depth, multipv)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            # Reuse the bot-move search when it already covers this request
+            cached = self._last_info_by_fen.get(fen)
+            if cached is not None and depth <= cached["depth"] and multipv <= len(cached["result"]["multipv"]):
+                return cached["result"]
+
         limit = chess.engine.Limit(depth=depth)
-        info = self.engine.analyse(board, limit, multipv=multipv)
-
-        def parse_info(entry):
-            score = entry["score"].pov(board.turn)
-            if score.is_mate():
-                eval_str = f"mate {score.mate()}"
-                eval_cp = None
-            else:
-                eval_cp = score.score()
-                eval_str = f"{eval_cp} cp"
-
-            pv_moves = []
-            if "pv" in entry:
-                pv_moves = [m.uci() for m in entry["pv"][:8]]
-
-            return {
-                "eval_str": eval_str,
-                "eval_cp": eval_cp,
-                "pv": pv_moves,
-            }
+        with self._checkout() as engine:
+            info = engine.analyse(board, limit, multipv=multipv)
 
         if isinstance(info, list):
-            parsed = [parse_info(e) for e in info]
-            return {
+            parsed = [self._parse_info(e, board) for e in info]
+            result = {
                 "primary": parsed[0],
                 "multipv": parsed,
             }
+        else:
+            parsed = self._parse_info(info, board)
+            result = {
+                "primary": parsed,
+                "multipv": [parsed],
+            }
 
-        parsed = parse_info(info)
-        return {
-            "primary": parsed,
-            "multipv": [parsed],
-        }
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self._cache_maxlen:
+                self._cache.popitem(last=False)
+        return result
 
     def quit(self):
-        try:
-            self.engine.quit()
-        except Exception:
-            pass
+        for engine in self.pool:
+            try:
+                engine.quit()
+            except Exception:
+                pass
 
 
 # Global engine instance (single-user app)
@@ -1,3 +1,5 @@
+import shutil
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List
 
@@ -18,6 +20,7 @@ class Settings(BaseSettings):
 
     # Stockfish
     STOCKFISH_PATH: Optional[str] = None
+    STOCKFISH_POOL_SIZE: int = 2            # engine processes; CPU threads are split between them
 
     # Defaults
     DEFAULT_BOT_DIFFICULTY: str = "medium"  # easy | medium | hard
@@ -32,14 +35,16 @@ class Settings(BaseSettings):
 settings = Settings()
 
 
+@lru_cache(maxsize=1)
 def find_stockfish_binary() -> str:
     """
-    Resolve Stockfish binary path.
+    Resolve Stockfish binary path (once per process).
 
     Priority:
     1. STOCKFISH_PATH env var
-    2. Common OS install locations
-    3. Raise clear error if not found
+    2. `stockfish` on PATH
+    3. Common OS install locations
+    4. Raise clear error if not found
     """
     if settings.STOCKFISH_PATH:
         path = Path(settings.STOCKFISH_PATH)
@@ -47,6 +52,10 @@ def find_stockfish_binary() -> str:
             return str(path)
         raise FileNotFoundError(f"STOCKFISH_PATH set but not found: {path}")
 
+    on_path = shutil.which("stockfish")
+    if on_path:
+        return on_path
+
     common_paths: List[Path] = [
         # Linux
         Path("/usr/bin/stockfish"),
@@ -1,12 +1,16 @@
 import sys
 import asyncio
+from typing import Optional
 
 # ✅ Windows: ensure asyncio supports subprocesses (needed by python-chess UCI engine)
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+import anyio.from_thread
+import anyio.to_thread
+from fastapi import BackgroundTasks, Cookie, Depends, FastAPI, Response, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .models import (
     NewGameRequest,
@@ -14,41 +18,29 @@ from .models import (
     UndoRequest,
     MoveResponse,
     StateResponse,
+    GameState,
+    AgentOutput,
 )
-from .session import SESSION
+from .session import SESSION_COOKIE, Session, find_session, get_session
 from .analysis import update_mental_signals_after_move
-from .agent import run_coach_agent
+from .agent import fallback_report, run_coach_agent, stream_coach_agent
 from . import chess_engine  # module import so ENGINE can be initialized safely
 
 
-# ---------------- WebSocket manager ----------------
+def _update_payload(state: GameState, agent_out: Optional[AgentOutput]) -> dict:
+    """
+    Build a WS "update" message. Models are dumped once here and the same dict
+    is handed to every client send.
+    """
+    return {
+        "type": "update",
+        "move_id": state.move_id,
+        "state": state.model_dump(),
+        "agent_output": agent_out.model_dump() if agent_out else None,
+    }
 
-class WSManager:
-    def __init__(self):
-        self.connections: list[WebSocket] = []
 
-    async def connect(self, ws: WebSocket):
-        await ws.accept()
-        self.connections.append(ws)
-
-    def disconnect(self, ws: WebSocket):
-        if ws in self.connections:
-            self.connections.remove(ws)
-
-    async def broadcast(self, payload: dict):
-        dead = []
-        for ws in self.connections:
-            try:
-                await ws.send_json(payload)
-            except Exception:
-                dead.append(ws)
-        for ws in dead:
-            self.disconnect(ws)
-
-
-ws_manager = WSManager()
-
-app = FastAPI(title="Agentic Chess Coach")
+app = FastAPI(title="Agentic Chess Coach", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -78,10 +70,27 @@ def shutdown():
             pass
 
 
+# ---------------- Sessions ----------------
+
+async def current_session(
+    response: Response,
+    token: Optional[str] = Cookie(None, alias=SESSION_COOKIE),
+) -> Session:
+    """
+    Resolve the caller's session from its cookie, starting one (and setting the
+    cookie) on first contact or after the old one expired.
+    Async so the session store is only touched from the event loop.
+    """
+    new_token, session = get_session(token)
+    if new_token != token:
+        response.set_cookie(SESSION_COOKIE, new_token, httponly=True, samesite="lax")
+    return session
+
+
 # ---------------- REST endpoints ----------------
 
 @app.post("/api/new_game", response_model=StateResponse)
-def new_game(req: NewGameRequest):
+async def new_game(req: NewGameRequest, session: Session = Depends(current_session)):
     side = req.side.lower()
     if side not in ("white", "black"):
         raise HTTPException(status_code=400, detail="side must be 'white' or 'black'")
@@ -94,142 +103,197 @@ def new_game(req: NewGameRequest):
     if verbosity < 1 or verbosity > 3:
         raise HTTPException(status_code=400, detail="coach_verbosity must be 1..3")
 
-    SESSION.reset(side=side, difficulty=difficulty, verbosity=verbosity)
+    async with session.lock:
+        session.reset(side=side, difficulty=difficulty, verbosity=verbosity)
 
-    # If player chose black, let bot play first (as white)
-    if side == "black":
-        if chess_engine.ENGINE is None:
-            raise HTTPException(status_code=500, detail="Engine not initialized")
-        bot_move = chess_engine.ENGINE.get_bot_move(SESSION.board, SESSION.bot_difficulty)
-        SESSION.board.push(bot_move)
-        SESSION.move_list.append(bot_move.uci())
+        # If player chose black, let bot play first (as white)
+        if side == "black":
+            if chess_engine.ENGINE is None:
+                raise HTTPException(status_code=500, detail="Engine not initialized")
+            bot_move = await anyio.to_thread.run_sync(chess_engine.ENGINE.get_bot_move, session.board, session.bot_difficulty)
+            session.board.push(bot_move)
+            session.move_list.append(bot_move.uci())
 
-    state = SESSION.to_state()
-    return StateResponse(state=state, agent_output=SESSION.last_agent_output)
+        state = session.to_state()
+        return StateResponse(state=state, agent_output=session.last_agent_output)
 
 
 @app.get("/api/state", response_model=StateResponse)
-def get_state():
+async def get_state(session: Session = Depends(current_session)):
     # ✅ return last agent output so refresh restores tabs
-    return StateResponse(state=SESSION.to_state(), agent_output=SESSION.last_agent_output)
+    return StateResponse(state=session.to_state(), agent_output=session.last_agent_output)
 
 
 @app.post("/api/undo", response_model=StateResponse)
-def undo(req: UndoRequest):
-    # allow undo only if at least one move exists
-    if len(SESSION.move_list) == 0:
-        return StateResponse(state=SESSION.to_state(), agent_output=SESSION.last_agent_output)
-
-    # Undo one half-move (last move)
-    SESSION.board.pop()
-    SESSION.move_list.pop()
+async def undo(req: UndoRequest, session: Session = Depends(current_session)):
+    async with session.lock:
+        # allow undo only if at least one move exists
+        if len(session.move_list) == 0:
+            return StateResponse(state=session.to_state(), agent_output=session.last_agent_output)
+
+        # Undo one half-move (last move)
+        session.board.pop()
+        session.move_list.pop()
+
+        # Count undo attempts (signal)
+        session.undo_attempts += 1
+        session.move_id += 1
+
+        # Keep last_agent_output (or you could clear it if you want)
+        state = session.to_state()
+        return StateResponse(state=state, agent_output=session.last_agent_output)
+
+
+async def _publish_agent_output(session: Session, agent_out: AgentOutput) -> GameState:
+    """
+    Store a finished coach report on the session and push it to WS clients.
+    Call with session.lock held; returns the state snapshot that was sent.
+    """
+    # Persist last agent output so refresh restores it
+    session.last_agent_output = agent_out
+    session.last_move_was_blunder = agent_out.coach.move_quality == "Blunder"
+
+    state = session.to_state()
+
+    # WebSocket broadcast (optional enhancement); skip building the payload with no listeners
+    if session.ws.active_connections:
+        await session.ws.broadcast(_update_payload(state, agent_out))
+    return state
+
+
+async def _stream_coach_to_ws(session: Session, move_id: int, agent_kwargs: dict):
+    """
+    Background task for streamed moves: relay model text to WS clients as it arrives,
+    then publish the parsed report like a normal update.
+    Runs after the HTTP response has been sent; the agent itself runs in a worker thread.
+
+    Every message carries the move_id the run was started for. The result is only
+    stored (under the session lock) if no move/undo/new game happened meanwhile;
+    otherwise it is dropped and clients ignore the stale deltas.
+    """
+    ws_manager = session.ws
+
+    def on_delta(text: str):
+        # Blocking hop to the loop keeps deltas in order; skipped when nobody listens
+        if ws_manager.active_connections:
+            anyio.from_thread.run(
+                ws_manager.broadcast, {"type": "agent_delta", "move_id": move_id, "text": text}
+            )
 
-    # Count undo attempts (signal)
-    SESSION.undo_attempts += 1
+    try:
+        agent_out = await anyio.to_thread.run_sync(
+            lambda: stream_coach_agent(**agent_kwargs, on_delta=on_delta)
+        )
+    except Exception as exc:
+        # LLM/network failure: still close out the draft with a placeholder report
+        agent_out = fallback_report(f"Coach agent failed: {exc}")
 
-    # Keep last_agent_output (or you could clear it if you want)
-    state = SESSION.to_state()
-    return StateResponse(state=state, agent_output=SESSION.last_agent_output)
+    async with session.lock:
+        if session.move_id == move_id:
+            await _publish_agent_output(session, agent_out)
 
 
 @app.post("/api/move", response_model=MoveResponse)
-def make_move(req: MoveRequest):
+async def make_move(
+    req: MoveRequest,
+    background_tasks: BackgroundTasks,
+    session: Session = Depends(current_session),
+):
+    # Stockfish and the agent block for seconds; they run in worker threads
+    # so the event loop keeps serving other requests and WS clients meanwhile.
     # Ensure engine exists
     if chess_engine.ENGINE is None:
         raise HTTPException(status_code=500, detail="Engine not initialized")
 
-    # Apply self-report (optional)
-    if req.self_report is not None:
-        SESSION.self_report = req.self_report
+    async with session.lock:
+        # Apply self-report (optional)
+        if req.self_report is not None:
+            session.self_report = req.self_report
 
-    # Validate and play user's move
-    uci = req.uci_move.strip()
-    try:
-        move = SESSION.board.parse_uci(uci)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid UCI move")
-
-    if move not in SESSION.board.legal_moves:
-        raise HTTPException(status_code=400, detail="Illegal move")
-
-    # Update think time
-    if req.think_time_ms is not None:
-        SESSION.think_times_ms.append(int(req.think_time_ms))
-
-    # We compute mental streak updates after agent classification.
-    # But we can compute "rapid after blunder" based on previous move state.
-    # For now, update with move_quality=None (agent will compute later).
-    SESSION.blunder_streak, SESSION.rapid_after_blunder = update_mental_signals_after_move(
-        move_quality=None,
-        think_time_ms=req.think_time_ms,
-        last_move_was_blunder=(SESSION.blunder_streak > 0),
-        current_blunder_streak=SESSION.blunder_streak,
-    )
-
-    # Push user move
-    SESSION.board.push(move)
-    SESSION.move_list.append(uci)
-
-    # If game over after user's move, we can still run agent (optional),
-    # but we will skip bot reply.
-    bot_move_uci = None
-    if not SESSION.board.is_game_over():
-        bot_move = chess_engine.ENGINE.get_bot_move(SESSION.board, SESSION.bot_difficulty)
-        SESSION.board.push(bot_move)
-        bot_move_uci = bot_move.uci()
-        SESSION.move_list.append(bot_move_uci)
-
-    # Run agent after full ply (user + bot if any)
-    agent_out = run_coach_agent(
-        board=SESSION.board,
-        move_list=SESSION.move_list,
-        player_side=SESSION.player_side,
-        bot_difficulty=SESSION.bot_difficulty,
-        coach_verbosity=SESSION.coach_verbosity,
-        signals={
-            "think_times_ms": SESSION.think_times_ms,
-            "blunder_streak": SESSION.blunder_streak,
-            "undo_attempts": SESSION.undo_attempts,
-            "rapid_after_blunder": SESSION.rapid_after_blunder,
-            "self_report": SESSION.self_report,
-        },
-    )
+        # Validate and play user's move
+        uci = req.uci_move.strip()
+        try:
+            move = session.board.parse_uci(uci)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid UCI move")
+
+        if move not in session.board.legal_moves:
+            raise HTTPException(status_code=400, detail="Illegal move")
+
+        # Update think time
+        if req.think_time_ms is not None:
+            session.record_think_time(int(req.think_time_ms))
+
+        # We compute mental streak updates after agent classification.
+        # But we can compute "rapid after blunder" based on previous move state.
+        # For now, update with move_quality=None (agent will compute later).
+        session.blunder_streak, session.rapid_after_blunder = update_mental_signals_after_move(
+            move_quality=None,
+            think_time_ms=req.think_time_ms,
+            last_move_was_blunder=session.last_move_was_blunder,
+            current_blunder_streak=session.blunder_streak,
+        )
 
-    # Persist last agent output so refresh restores it
-    SESSION.last_agent_output = agent_out
+        # Push user move
+        session.move_id += 1
+        session.board.push(move)
+        session.move_list.append(uci)
+
+        # If game over after user's move, we can still run agent (optional),
+        # but we will skip bot reply.
+        bot_move_uci = None
+        if not session.board.is_game_over():
+            bot_move = await anyio.to_thread.run_sync(chess_engine.ENGINE.get_bot_move, session.board, session.bot_difficulty)
+            session.board.push(bot_move)
+            bot_move_uci = bot_move.uci()
+            session.move_list.append(bot_move_uci)
+
+        agent_kwargs = dict(
+            board=session.board,
+            move_list=session.move_list,
+            player_side=session.player_side,
+            bot_difficulty=session.bot_difficulty,
+            coach_verbosity=session.coach_verbosity,
+            signals={
+                "think_times_ms": list(session.think_times_ms),  # recent window only
+                "mean_think_ms": session.mean_think_ms(),
+                "blunder_streak": session.blunder_streak,
+                "undo_attempts": session.undo_attempts,
+                "rapid_after_blunder": session.rapid_after_blunder,
+                "self_report": session.self_report,
+            },
+        )
 
-    state = SESSION.to_state()
+        if req.stream_agent:
+            # Respond now; coaching follows over WS. Snapshot the board/moves since the
+            # session can move on while the agent is still running.
+            agent_kwargs["board"] = session.board.copy()
+            agent_kwargs["move_list"] = list(session.move_list)
+            background_tasks.add_task(_stream_coach_to_ws, session, session.move_id, agent_kwargs)
+            return MoveResponse(state=session.to_state(), agent_output=None, bot_move=bot_move_uci)
 
-    # WebSocket broadcast (optional enhancement)
-    try:
-        # fire-and-forget: safe in sync endpoint by running a loop task if possible
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            loop.create_task(
-                ws_manager.broadcast(
-                    {"type": "update", "state": state.model_dump(), "agent_output": agent_out.model_dump()}
-                )
-            )
-    except Exception:
-        pass
+        # Run agent after full ply (user + bot if any)
+        agent_out = await anyio.to_thread.run_sync(lambda: run_coach_agent(**agent_kwargs))
+        state = await _publish_agent_output(session, agent_out)
 
-    return MoveResponse(state=state, agent_output=agent_out, bot_move=bot_move_uci)
+        return MoveResponse(state=state, agent_output=agent_out, bot_move=bot_move_uci)
 
 
 # ---------------- WebSocket ----------------
 
 @app.websocket("/ws/game")
 async def ws_game(ws: WebSocket):
+    # Attach to the session set up over REST; unknown cookies are refused
+    session = find_session(ws.cookies.get(SESSION_COOKIE))
+    if session is None:
+        await ws.close(code=1008)
+        return
+
+    ws_manager = session.ws
     await ws_manager.connect(ws)
     try:
         # Send initial snapshot on connect
-        await ws.send_json(
-            {
-                "type": "update",
-                "state": SESSION.to_state().model_dump(),
-                "agent_output": SESSION.last_agent_output.model_dump() if SESSION.last_agent_output else None,
-            }
-        )
+        await ws_manager.send(ws, _update_payload(session.to_state(), session.last_agent_output))
         while True:
             # We don't require client messages; keep connection alive.
             await ws.receive_text()
@@ -237,3 +301,11 @@ async def ws_game(ws: WebSocket):
         ws_manager.disconnect(ws)
     except Exception:
         ws_manager.disconnect(ws)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # WS frames are small JSON batches: per-message deflate would zlib them per
+    # client for little bandwidth gain, so it is turned off.
+    uvicorn.run("app.main:app", host="127.0.0.1", port=8000, ws_per_message_deflate=False)
@@ -20,6 +20,10 @@ class MoveRequest(BaseModel):
     self_report: Optional[str] = Field(
         default=None, description="calm | tilted | tired | focused"
     )
+    stream_agent: bool = Field(
+        default=False,
+        description="Return right after the bot move and stream coaching over /ws/game",
+    )
 
 
 class UndoRequest(BaseModel):
@@ -36,7 +40,8 @@ class ClockState(BaseModel):
 
 
 class SignalState(BaseModel):
-    think_times_ms: List[int] = []
+    recent_think_times: List[int] = []  # last few moves, oldest first
+    mean_think_ms: Optional[int] = None  # over the whole game
     blunder_streak: int = 0
     undo_attempts: int = 0
     rapid_after_blunder: bool = False
@@ -52,6 +57,7 @@ class GameState(BaseModel):
     signals: SignalState
     game_over: bool = False
     result: Optional[str] = None
+    move_id: int = 0  # bumped on every move/undo/new game; tags streamed coaching
 
 
 # ============================================================
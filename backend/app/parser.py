@@ -1,5 +1,6 @@
 import re
-from typing import Optional, Dict, Any, List
+from itertools import islice, takewhile
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 
 
 SECTION_HEADERS = {
@@ -11,22 +12,56 @@ SECTION_HEADERS = {
 }
 
 
-def _extract_section(text: str, start_header: str, end_headers: List[str]) -> Optional[str]:
+# Header strings as one tuple for str.startswith, plus the reverse map to resolve a hit
+_SECTION_PREFIXES = tuple(SECTION_HEADERS.values())
+_SECTION_BY_HEADER = {header: key for key, header in SECTION_HEADERS.items()}
+
+
+def _extract_sections(text: str) -> Dict[str, str]:
     """
-    Extract text between start_header and the nearest of end_headers.
+    Find every header once and slice the text between consecutive hits.
+    Each section runs from the end of its header to the next header found after it.
     """
-    start_idx = text.find(start_header)
-    if start_idx == -1:
-        return None
-
-    start_idx += len(start_header)
-    end_idx = len(text)
-    for h in end_headers:
-        idx = text.find(h, start_idx)
+    found = []
+    for key, header in SECTION_HEADERS.items():
+        idx = text.find(header)
         if idx != -1:
-            end_idx = min(end_idx, idx)
+            found.append((idx, idx + len(header), key))
+    found.sort()
+
+    ends = [idx for idx, _, _ in found[1:]] + [len(text)]
+    return {key: text[body:end].strip() for (_, body, key), end in zip(found, ends)}
+
 
-    return text[start_idx:end_idx].strip()
+# Labels the line scanner recognizes inside each section, mapped to output fields
+_BULLET_LABELS: Dict[str, Dict[str, str]] = {
+    "mental": {"Observed signals": "observed_signals"},
+    "position": {
+        "Why": "why",
+        "Immediate threats": "threats",
+        "Plans (White)": "plans_white",
+        "Plans (Black)": "plans_black",
+    },
+    "coaching": {"Actionable": "bullets"},
+}
+_LINE_LABELS: Dict[str, Dict[str, str]] = {
+    "mental": {"Inference": "inference", "10-second micro-reset": "micro_reset_tip"},
+    "position": {"Eval": "eval"},
+    "move_quality": {"Label": "move_quality"},
+    "coaching": {"Short PV": "pv"},
+}
+
+# The schema is fixed, so both maps are folded once into one table per section:
+# label -> (field, opens_bullets). The scanner then needs a single lookup per line.
+_SECTION_LABELS: Dict[Optional[str], Dict[str, Tuple[str, bool]]] = {
+    key: {
+        **{label: (field, False) for label, field in _LINE_LABELS.get(key, {}).items()},
+        **{label: (field, True) for label, field in _BULLET_LABELS.get(key, {}).items()},
+    }
+    for key in SECTION_HEADERS
+}
+_SECTION_LABELS[None] = {}  # text before the first header
+_NO_LABEL: Tuple[Optional[str], bool] = (None, False)
 
 
 def parse_agent_report_text(text: str) -> Optional[Dict[str, Any]]:
@@ -37,86 +72,194 @@ def parse_agent_report_text(text: str) -> Optional[Dict[str, Any]]:
     Returns None if parsing fails (frontend can show raw text).
     """
     try:
-        mental_raw = _extract_section(
-            text,
-            SECTION_HEADERS["mental"],
-            [SECTION_HEADERS["position"]],
-        )
-        position_raw = _extract_section(
-            text,
-            SECTION_HEADERS["position"],
-            [SECTION_HEADERS["move_quality"]],
-        )
-        coaching_raw = _extract_section(
-            text,
-            SECTION_HEADERS["coaching"],
-            [SECTION_HEADERS["bot"]],
-        )
-
-        if not (mental_raw and position_raw and coaching_raw):
-            return None
-
-        # --- Mental ---
-        mental = {
-            "observed_signals": _extract_bullets(mental_raw, "Observed signals"),
-            "inference": _extract_line(mental_raw, "Inference"),
-            "micro_reset_tip": _extract_line(mental_raw, "10-second micro-reset"),
-        }
-
-        # --- Position ---
-        position = {
-            "eval": _extract_line(position_raw, "Eval"),
-            "why": _extract_bullets(position_raw, "Why"),
-            "threats": _extract_bullets(position_raw, "Immediate threats"),
+        parsed = _scan_report(text)
+        if parsed is None:
+            # Headers not at line starts (e.g. inline): use the search-based parser
+            parsed = _parse_by_search(text)
+        return parsed
+    except Exception:
+        return None
+
+
+def _scan_report(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Single pass over the report lines.
+
+    Header lines switch the current section, "label:" lines either open a bullet
+    list or carry a single-line value, and "-" lines extend the open bullet list.
+    Labels only count inside their own section; the first occurrence wins.
+    Returns None if the mental, position or coaching section is missing or empty.
+    """
+    fields: Dict[str, Any] = {}
+    filled = set()
+    section: Optional[str] = None
+    labels = _SECTION_LABELS[None]
+    bullets: Optional[List[str]] = None
+    pending: Optional[str] = None  # line label whose value sits on the next line
+
+    for line in text.splitlines():
+        s = line.strip()
+
+        head = s.lstrip("#* ")
+        if head.startswith(_SECTION_PREFIXES):
+            # Only header lines pay for finding which prefix matched
+            header = next(h for h in _SECTION_PREFIXES if head.startswith(h))
+            section, bullets, pending = _SECTION_BY_HEADER[header], None, None
+            labels = _SECTION_LABELS[section]
+            continue
+
+        if not s:
+            bullets = None
+            continue
+        filled.add(section)
+
+        if pending is not None:
+            fields[pending] = s
+            pending = None
+            continue
+
+        if bullets is not None:
+            if s.startswith("-"):
+                bullets.append(s.lstrip("-").strip())
+                continue
+            bullets = None
+
+        label, colon, value = s.partition(":")
+        # Drop markdown emphasis around the label ("**Why:**", "_Eval_:")
+        label = label.strip(" *_")
+
+        field, opens_bullets = labels.get(label, _NO_LABEL)
+        if opens_bullets:
+            if field not in fields:
+                bullets = fields[field] = []
+            continue
+
+        if colon and field is not None and field not in fields:
+            value = value.strip(" *_")
+            if value:
+                fields[field] = value
+            else:
+                pending = field
+
+    if not {"mental", "position", "coaching"} <= filled:
+        return None
+
+    return {
+        "mental": {
+            "observed_signals": fields.get("observed_signals", []),
+            "inference": fields.get("inference", ""),
+            "micro_reset_tip": fields.get("micro_reset_tip", ""),
+        },
+        "position": {
+            "eval": fields.get("eval", ""),
+            "why": fields.get("why", []),
+            "threats": fields.get("threats", []),
             "plans": {
-                "white": _extract_bullets(position_raw, "Plans (White)"),
-                "black": _extract_bullets(position_raw, "Plans (Black)"),
+                "white": fields.get("plans_white", []),
+                "black": fields.get("plans_black", []),
             },
-        }
-
-        # --- Coaching ---
-        coach = {
-            "move_quality": _extract_line(text, "Label"),
-            "bullets": _extract_bullets(coaching_raw, "Actionable"),
-            "pv": _extract_line(coaching_raw, "Short PV"),
-        }
-
-        return {
-            "mental": mental,
-            "position": position,
-            "coach": coach,
-        }
-    except Exception:
+        },
+        "coach": {
+            "move_quality": fields.get("move_quality", ""),
+            "bullets": fields.get("bullets", []),
+            "pv": fields.get("pv", ""),
+        },
+    }
+
+
+def _parse_by_search(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Search-based parser: finds headers and labels anywhere in the text.
+    Slower than _scan_report, but tolerant of inline headers.
+    """
+    sections = _extract_sections(text)
+    mental_raw = sections.get("mental")
+    position_raw = sections.get("position")
+    move_quality_raw = sections.get("move_quality", "")
+    coaching_raw = sections.get("coaching")
+
+    if not (mental_raw and position_raw and coaching_raw):
         return None
 
+    # Each block is split once; bullet labels are located while indexing its lines
+    mental_lines, mental_at = _index_labels(mental_raw, _BULLET_LABELS["mental"])
+    position_lines, position_at = _index_labels(position_raw, _BULLET_LABELS["position"])
+    coaching_lines, coaching_at = _index_labels(coaching_raw, _BULLET_LABELS["coaching"])
+
+    # --- Mental ---
+    mental = {
+        "observed_signals": _extract_bullets(mental_lines, mental_at.get("Observed signals")),
+        "inference": _extract_line(mental_raw, "Inference"),
+        "micro_reset_tip": _extract_line(mental_raw, "10-second micro-reset"),
+    }
+
+    # --- Position ---
+    position = {
+        "eval": _extract_line(position_raw, "Eval"),
+        "why": _extract_bullets(position_lines, position_at.get("Why")),
+        "threats": _extract_bullets(position_lines, position_at.get("Immediate threats")),
+        "plans": {
+            "white": _extract_bullets(position_lines, position_at.get("Plans (White)")),
+            "black": _extract_bullets(position_lines, position_at.get("Plans (Black)")),
+        },
+    }
+
+    # --- Coaching ---
+    coach = {
+        "move_quality": _extract_line(move_quality_raw, "Label"),
+        "bullets": _extract_bullets(coaching_lines, coaching_at.get("Actionable")),
+        "pv": _extract_line(coaching_raw, "Short PV"),
+    }
+
+    return {
+        "mental": mental,
+        "position": position,
+        "coach": coach,
+    }
+
 
 # ----------------------------
 # Small parsing helpers
 # ----------------------------
 
+# One compiled pattern per known single-line label (built at import, not per call)
+_LINE_PATTERNS: Dict[str, "re.Pattern[str]"] = {
+    label: re.compile(rf"{re.escape(label)}\s*:\s*(.+)")
+    for label in ("Inference", "10-second micro-reset", "Eval", "Label", "Short PV")
+}
+
+
 def _extract_line(block: str, label: str) -> str:
     """
     Extract a single-line value after 'label:'.
     """
-    pattern = rf"{label}\s*:\s*(.+)"
-    match = re.search(pattern, block)
+    match = _LINE_PATTERNS[label].search(block)
     return match.group(1).strip() if match else ""
 
 
-def _extract_bullets(block: str, label: str) -> List[str]:
+def _index_labels(block: str, labels: Iterable[str]) -> Tuple[List[str], Dict[str, int]]:
     """
-    Extract bullet points under a given label.
+    Split a block into lines once and map each label to the first line containing it.
     """
-    start = block.find(label)
-    if start == -1:
+    lines = block.splitlines()
+    wanted = set(labels)
+    index: Dict[str, int] = {}
+    for i, line in enumerate(lines):
+        for label in wanted:
+            if label in line:
+                index[label] = i
+        wanted.difference_update(index)
+        if not wanted:
+            break
+    return lines, index
+
+
+def _extract_bullets(lines: List[str], label_idx: Optional[int]) -> List[str]:
+    """
+    Extract bullet points on the lines following a label's line.
+    """
+    if label_idx is None:
         return []
 
-    lines = block[start:].splitlines()[1:]
-    bullets = []
-    for line in lines:
-        line = line.strip()
-        if line.startswith("-"):
-            bullets.append(line.lstrip("-").strip())
-        else:
-            break
-    return bullets
+    bullets = takewhile(lambda line: line.lstrip().startswith("-"), islice(lines, label_idx + 1, None))
+    return [line.strip().lstrip("-").strip() for line in bullets]
@@ -1,41 +1,130 @@
+import asyncio
+import secrets
+import time
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import Deque, List, Dict, Optional, Tuple
 
 import chess
 
 from .models import GameState, ClockState, SignalState, AgentOutput
+from .ws import WebSocketManager
 
 
-def _empty_captured() -> Dict[str, List[str]]:
-    return {"white": [], "black": []}
+def _empty_captured() -> Dict[str, array]:
+    # chess.PieceType ints per color; symbols are only built in to_state()
+    return {"white": array("b"), "black": array("b")}
 
 
-@dataclass
+# Think times kept per move; the mean covers the whole game via running totals
+THINK_WINDOW = 20
+
+
+def _think_window() -> Deque[int]:
+    return deque(maxlen=THINK_WINDOW)
+
+
+def _captured_symbols(captured: Dict[str, array]) -> Dict[str, List[str]]:
+    return {color: [chess.piece_symbol(pt) for pt in pts] for color, pts in captured.items()}
+
+
+_UNSET = object()
+
+
+class CachedBoard(chess.Board):
+    """
+    chess.Board that remembers its default FEN string and game outcome until
+    the position changes.
+
+    The same FEN is asked for several times per request (state snapshot, agent
+    tools, engine cache keys) and every state read checks for game over, so both
+    are computed once and invalidated on the mutators this app uses:
+    push/pop/reset/set_fen/clear. is_game_over() and result() go through outcome().
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._invalidate()
+        super().__init__(*args, **kwargs)
+
+    def _invalidate(self) -> None:
+        self._fen: Optional[str] = None
+        self._outcome = _UNSET
+
+    def fen(self, **kwargs) -> str:
+        if kwargs:
+            return super().fen(**kwargs)
+        if self._fen is None:
+            self._fen = super().fen()
+        return self._fen
+
+    def outcome(self, *, claim_draw: bool = False) -> Optional[chess.Outcome]:
+        if claim_draw:
+            return super().outcome(claim_draw=True)
+        if self._outcome is _UNSET:
+            self._outcome = super().outcome()
+        return self._outcome
+
+    def push(self, move: chess.Move) -> None:
+        self._invalidate()
+        super().push(move)
+
+    def pop(self) -> chess.Move:
+        self._invalidate()
+        return super().pop()
+
+    def reset(self) -> None:
+        self._invalidate()
+        super().reset()
+
+    def set_fen(self, fen: str) -> None:
+        self._invalidate()
+        super().set_fen(fen)
+
+    def clear(self) -> None:
+        self._invalidate()
+        super().clear()
+
+
+@dataclass(slots=True)
 class Session:
-    board: chess.Board = field(default_factory=chess.Board)
+    board: chess.Board = field(default_factory=CachedBoard)
     player_side: str = "white"  # "white" or "black"
     bot_difficulty: str = "medium"
     coach_verbosity: int = 2
 
     move_list: List[str] = field(default_factory=list)  # UCI moves (string)
-    captured_pieces: Dict[str, List[str]] = field(default_factory=_empty_captured)
+    captured_pieces: Dict[str, array] = field(default_factory=_empty_captured)  # piece types
 
     # Simple clocks
     white_ms: int = 5 * 60 * 1000
     black_ms: int = 5 * 60 * 1000
 
     # Mental signals
-    think_times_ms: List[int] = field(default_factory=list)
+    think_times_ms: Deque[int] = field(default_factory=_think_window)
+    think_total_ms: int = 0
+    think_count: int = 0
     blunder_streak: int = 0
     undo_attempts: int = 0
     rapid_after_blunder: bool = False
     self_report: Optional[str] = None
+    last_move_was_blunder: bool = False  # from the coach's label for the player's last move
 
     # ✅ Persist last agent output across refresh
     last_agent_output: Optional[AgentOutput] = None
 
+    # Bumped on every move, undo and new game; a streamed coach report only lands
+    # if the session is still at the move it was started for
+    move_id: int = 0
+
+    # Per-session plumbing; kept across reset() so open tabs stay attached
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+    ws: WebSocketManager = field(default_factory=WebSocketManager, repr=False, compare=False)
+    last_seen: float = field(default_factory=time.monotonic, repr=False, compare=False)
+
     def reset(self, side: str, difficulty: str, verbosity: int):
-        self.board = chess.Board()
+        self.board.reset()  # in place; background coach runs work on their own copy
+        self.move_id += 1  # not zeroed: in-flight streams for the old game must not match
         self.player_side = side
         self.bot_difficulty = difficulty
         self.coach_verbosity = verbosity
@@ -43,17 +132,31 @@ class Session:
         self.captured_pieces = _empty_captured()
         self.white_ms = 5 * 60 * 1000
         self.black_ms = 5 * 60 * 1000
-        self.think_times_ms = []
+        self.think_times_ms.clear()
+        self.think_total_ms = 0
+        self.think_count = 0
         self.blunder_streak = 0
         self.undo_attempts = 0
         self.rapid_after_blunder = False
         self.self_report = None
+        self.last_move_was_blunder = False
         self.last_agent_output = None
 
+    def record_think_time(self, ms: int) -> None:
+        self.think_times_ms.append(ms)
+        self.think_total_ms += ms
+        self.think_count += 1
+
+    def mean_think_ms(self) -> Optional[int]:
+        return round(self.think_total_ms / self.think_count) if self.think_count else None
+
     def to_state(self) -> GameState:
-        clocks = ClockState(white_ms=self.white_ms, black_ms=self.black_ms)
-        signals = SignalState(
-            think_times_ms=self.think_times_ms,
+        # Every field comes from typed session state, so pydantic validation is skipped
+        # (model_construct). Lists are copied: validation used to do that for us.
+        clocks = ClockState.model_construct(white_ms=self.white_ms, black_ms=self.black_ms)
+        signals = SignalState.model_construct(
+            recent_think_times=list(self.think_times_ms),
+            mean_think_ms=self.mean_think_ms(),
             blunder_streak=self.blunder_streak,
             undo_attempts=self.undo_attempts,
             rapid_after_blunder=self.rapid_after_blunder,
@@ -63,21 +166,65 @@ class Session:
         # Determine whose turn (from board.turn)
         side_to_move = "white" if self.board.turn == chess.WHITE else "black"
 
-        # Game over / result
-        game_over = self.board.is_game_over()
-        result = self.board.result() if game_over else None
+        # Game over / result: one outcome read, cached on the board until the next push/pop
+        outcome = self.board.outcome()
+        game_over = outcome is not None
+        result = outcome.result() if outcome else None
 
-        return GameState(
+        return GameState.model_construct(
             fen=self.board.fen(),
             side_to_move=side_to_move,
-            move_list=self.move_list,
-            captured_pieces=self.captured_pieces,
+            move_list=list(self.move_list),
+            captured_pieces=_captured_symbols(self.captured_pieces),
             clocks=clocks,
             signals=signals,
             game_over=game_over,
             result=result,
+            move_id=self.move_id,
         )
 
 
-# Single-user in-memory session
-SESSION = Session()
+# ---------------- Session store ----------------
+
+SESSION_COOKIE = "coach_session"
+SESSION_TTL_S = 2 * 60 * 60  # idle sessions without open sockets are dropped after this
+
+# In-memory sessions keyed by the token in the SESSION_COOKIE cookie
+SESSIONS: Dict[str, Session] = {}
+
+
+def _evict_idle(now: float) -> None:
+    for token, session in list(SESSIONS.items()):
+        if (
+            now - session.last_seen > SESSION_TTL_S
+            and not session.ws.active_connections
+            and not session.lock.locked()
+        ):
+            del SESSIONS[token]
+
+
+def find_session(token: Optional[str]) -> Optional[Session]:
+    """
+    Look up a live session by token without creating one.
+    """
+    session = SESSIONS.get(token) if token else None
+    if session is not None:
+        session.last_seen = time.monotonic()
+    return session
+
+
+def get_session(token: Optional[str]) -> Tuple[str, Session]:
+    """
+    Return (token, session) for the given token, starting a new session under a
+    fresh token if it is missing or has expired. Callers set the cookie when the
+    returned token differs from the one they passed in.
+    """
+    session = find_session(token)
+    if session is not None:
+        return token, session
+
+    now = time.monotonic()
+    _evict_idle(now)
+    token = secrets.token_urlsafe(16)
+    session = SESSIONS[token] = Session(last_seen=now)
+    return token, session
@@ -1,39 +1,73 @@
-from typing import Set, Dict, Any
-from fastapi import WebSocket, WebSocketDisconnect
+import asyncio
+from typing import Dict, Any, List, Optional
+
+import orjson
+from fastapi import WebSocket
 
 
 class WebSocketManager:
     """
     Very lightweight WebSocket connection manager.
 
-    Single-session app for now, but structured to allow
-    multiple connections / sessions later.
+    Each Session owns one, so broadcasts only reach that session's tabs.
+
+    Broadcasts are queued and flushed together a few milliseconds later, so
+    messages emitted back-to-back (state update, streamed agent text) go out
+    as one JSON-array frame per client instead of one frame each.
     """
 
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+    def __init__(self, flush_interval: float = 0.005):
+        # A list: 1-2 tabs is the norm, and broadcast walks it every flush
+        self.active_connections: List[WebSocket] = []
+        self.flush_interval = flush_interval
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.add(websocket)
+        self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+
+    async def send(self, websocket: WebSocket, message: Dict[str, Any]):
+        """
+        Send one message to a single client, framed like a broadcast batch.
+        """
+        await websocket.send_bytes(orjson.dumps([message]))
 
     async def broadcast(self, message: Dict[str, Any]):
         """
-        Broadcast JSON-serializable message to all clients.
+        Queue a JSON-serializable message for all clients.
+        Delivery happens on the next flush; order is preserved.
         """
-        dead = []
-        for ws in self.active_connections:
-            try:
-                await ws.send_json(message)
-            except Exception:
-                dead.append(ws)
+        if not self.active_connections:
+            return
+        self._pending.append(message)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
 
-        for ws in dead:
-            self.disconnect(ws)
+    async def _flush_loop(self):
+        # One flusher at a time, so batches never overlap on a connection
+        try:
+            while self._pending:
+                await asyncio.sleep(self.flush_interval)
+                batch, self._pending = self._pending, []
+                # Serialize once; orjson's UTF-8 bytes go out as-is in a binary frame
+                await self._send_all(orjson.dumps(batch))
+        finally:
+            self._flush_task = None
 
+    async def _send_all(self, payload: bytes):
+        # Overlap writes so one slow client doesn't hold up the rest
+        conns = list(self.active_connections)
+        results = await asyncio.gather(
+            *(ws.send_bytes(payload) for ws in conns),
+            return_exceptions=True,
+        )
+        # Mark failed sends, then sweep them out in one pass (clients may have joined meanwhile)
+        dead = {id(ws) for ws, result in zip(conns, results) if isinstance(result, Exception)}
+        if dead:
+            self.active_connections = [ws for ws in self.active_connections if id(ws) not in dead]
 
-# Global manager
-WS_MANAGER = WebSocketManager()
@@ -0,0 +1,24 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.session import SESSION_COOKIE, SESSIONS
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One client (and so one session cookie) for the whole run
+    c = TestClient(app)
+    c.get("/api/state")
+    return c
+
+
+@pytest.fixture
+def session(client):
+    """
+    The shared client's session, reset in place to a fresh game as white.
+    Use instead of POSTing /api/new_game when the new-game flow isn't under test.
+    """
+    s = SESSIONS[client.cookies.get(SESSION_COOKIE)]
+    s.reset(side="white", difficulty="easy", verbosity=1)
+    return s
@@ -0,0 +1,207 @@
+from collections import OrderedDict
+
+import chess
+from langchain_core.messages import AIMessage
+
+from app import agent
+from app.agent import parse_agent_report, run_coach_agent
+
+
+REPORT = """[MENTAL_STATE_CHECK]
+Observed Signals:
+- Think time 1500ms
+- Blunder streak 0
+Inference (non-medical, uncertain):
+- Focused and calm
+10s Micro-Reset Tip:
+- Breathe in slowly
+
+[POSITION_SNAPSHOT]
+Eval:
+- +0.35 (20 cp)
+Why:
+- Central control
+Immediate Threats:
+- None
+Plans (White):
+- Castle kingside
+- d4 break
+Plans (Black):
+- ...c5
+
+[MOVE_QUALITY]
+Label:
+- Inaccuracy
+Reason:
+- lost tempo
+
+[COACHING]
+Actionable:
+- 1) Develop knights
+- 2) Castle
+- 3) Control center
+- 4) Extra
+Short PV (4-8 ply max):
+- e4 e5 Nf3 Nc6
+
+[BOT_MOVE]
+Explain:
+- solid
+Next-turn checklist:
+- check threats
+"""
+
+
+def test_parse_full_report():
+    out = parse_agent_report(REPORT)
+
+    assert out.mental.observed_signals == ["Think time 1500ms", "Blunder streak 0"]
+    assert out.mental.inference == "Focused and calm"
+    assert out.mental.micro_reset_tip == "Breathe in slowly"
+
+    assert out.position.eval == "+0.35 (20 cp)"
+    assert out.position.why == ["Central control"]
+    assert out.position.threats == ["None"]
+    assert out.position.plans["white"] == ["Castle kingside", "d4 break"]
+
+    assert out.coach.move_quality == "Inaccuracy"
+    assert len(out.coach.bullets) == 3
+    assert out.coach.pv == "e4 e5 Nf3 Nc6"
+    assert out.raw_text == REPORT
+
+
+def test_parse_missing_sections_uses_defaults():
+    out = parse_agent_report("no tags here")
+
+    assert out.coach.move_quality == "Good"
+    assert out.coach.bullets == []
+    assert out.position.eval == "unknown"
+    assert out.mental.observed_signals == []
+
+
+def test_parse_first_section_wins_on_duplicate_tag():
+    text = REPORT + "\n[MOVE_QUALITY]\nLabel:\n- Blunder\n"
+    out = parse_agent_report(text)
+
+    assert out.coach.move_quality == "Inaccuracy"
+
+
+def test_parse_crlf_report():
+    out = parse_agent_report(REPORT.replace("\n", "\r\n"))
+
+    assert out.model_dump(exclude={"raw_text"}) == parse_agent_report(REPORT).model_dump(exclude={"raw_text"})
+
+
+def test_parse_markdown_section_tags():
+    expected = parse_agent_report(REPORT).coach
+    for tag in ("### [COACHING]", "**[COACHING]**", "[COACHING]:"):
+        out = parse_agent_report(REPORT.replace("[COACHING]", tag))
+
+        assert out.coach == expected, tag
+
+
+def test_parse_keeps_all_black_plans():
+    text = REPORT.replace("Plans (Black):\n- ...c5\n", "Plans (Black):\n- ...c5\n- ...Nc6\n")
+    out = parse_agent_report(text)
+
+    assert out.position.plans["black"] == ["...c5", "...Nc6"]
+
+
+def test_parse_inline_values():
+    text = (
+        "[MENTAL_STATE_CHECK]\nInference: maybe tired\n10s Micro-Reset Tip: stretch\n"
+        "[POSITION_SNAPSHOT]\nEval: -1.2\n"
+        "[COACHING]\nActionable:\n1) Do x\n2) Do y\nShort PV: e4\n"
+    )
+    out = parse_agent_report(text)
+
+    assert out.mental.inference == "maybe tired"
+    assert out.mental.micro_reset_tip == "stretch"
+    assert out.position.eval == "-1.2"
+    assert out.coach.bullets == ["Do x", "Do y"]
+    assert out.coach.pv == "e4"
+
+
+def test_parse_markdown_bold_labels():
+    text = (
+        "[POSITION_SNAPSHOT]\n**Eval:** -0.5\n**Why:**\n- space\n- development\n"
+        "[MOVE_QUALITY]\n**Label:** Mistake\n"
+        "[COACHING]\n**Actionable:**\n1) Do x\n**Short PV (4-8 ply max):** e4 e5\n"
+    )
+    out = parse_agent_report(text)
+
+    assert out.position.eval == "-0.5"
+    assert out.position.why == ["space", "development"]
+    assert out.coach.move_quality == "Mistake"
+    assert out.coach.bullets == ["Do x"]
+    assert out.coach.pv == "e4 e5"
+
+
+def test_opening_book_answers_without_llm():
+    board = chess.Board()
+    for uci in ("e2e4", "e7e5"):
+        board.push_uci(uci)
+
+    out = run_coach_agent(
+        board=board,
+        move_list=["e2e4", "e7e5"],
+        player_side="white",
+        bot_difficulty="easy",
+        coach_verbosity=2,
+        signals={"think_times_ms": [1500], "blunder_streak": 0, "undo_attempts": 0},
+    )
+
+    assert out.coach.move_quality == "Good"
+    assert out.coach.pv
+    assert "Last think time: 1500 ms" in out.mental.observed_signals
+
+
+def test_report_cache_rebuilds_mental_tab_from_live_signals(monkeypatch):
+    calls = []
+
+    class FakeAgent:
+        def invoke(self, inputs):
+            calls.append(inputs)
+            return {"messages": [AIMessage(content=REPORT)]}
+
+    monkeypatch.setattr(agent, "_HAS_OPENAI_KEY", True)
+    monkeypatch.setattr(agent, "_get_agent", lambda: FakeAgent())
+    monkeypatch.setattr(agent, "_REPORT_CACHE", OrderedDict())
+
+    board = chess.Board()
+    board.push_uci("a2a3")
+    kwargs = dict(board=board, move_list=["a2a3"], player_side="white", bot_difficulty="easy", coach_verbosity=2)
+
+    first = run_coach_agent(**kwargs, signals={"undo_attempts": 0})
+    again = run_coach_agent(**kwargs, signals={"undo_attempts": 3, "self_report": "tired"})
+
+    assert len(calls) == 1
+    assert again.coach == first.coach
+    assert again.position == first.position
+    assert "Undo attempts: 3" in again.mental.observed_signals
+    assert "Self-report: tired" in again.mental.observed_signals
+    assert "Focused and calm" not in again.mental.inference
+
+
+def test_report_cache_misses_on_transposition(monkeypatch):
+    calls = []
+
+    class FakeAgent:
+        def invoke(self, inputs):
+            calls.append(inputs)
+            return {"messages": [AIMessage(content=REPORT)]}
+
+    monkeypatch.setattr(agent, "_HAS_OPENAI_KEY", True)
+    monkeypatch.setattr(agent, "_get_agent", lambda: FakeAgent())
+    monkeypatch.setattr(agent, "_REPORT_CACHE", OrderedDict())
+
+    # Same final position, reached with a different last move
+    for moves in (["a2a3", "h7h6", "b2b3"], ["b2b3", "h7h6", "a2a3"]):
+        board = chess.Board()
+        for uci in moves:
+            board.push_uci(uci)
+        run_coach_agent(
+            board=board, move_list=moves, player_side="white", bot_difficulty="easy", coach_verbosity=2, signals={}
+        )
+
+    assert len(calls) == 2
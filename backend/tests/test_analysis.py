@@ -0,0 +1,47 @@
+from app.analysis import (
+    classify_move_qualities,
+    classify_move_quality_from_swing,
+    update_mental_signals_after_move,
+)
+
+
+def test_classify_thresholds():
+    cases = {
+        0: "Good",
+        -30: "Good",
+        -31: "Inaccuracy",
+        -90: "Inaccuracy",
+        -91: "Mistake",
+        -200: "Mistake",
+        -201: "Blunder",
+        150: "Good",
+    }
+    for swing, label in cases.items():
+        q = classify_move_quality_from_swing(100, 100 + swing)
+        assert q.label == label, swing
+        assert q.swing_cp == swing
+
+
+def test_classify_unknown_eval_defaults_to_good():
+    q = classify_move_quality_from_swing(None, -500)
+    assert q.label == "Good"
+    assert q.swing_cp is None
+
+
+def test_classify_batch_matches_single():
+    before = [100, 100, None, 50, 0]
+    after = [90, -150, 20, -40, -300]
+    batch = classify_move_qualities(before, after)
+    assert batch == [classify_move_quality_from_swing(b, a) for b, a in zip(before, after)]
+
+
+def test_update_mental_signals_streak_and_rapid():
+    assert update_mental_signals_after_move(
+        move_quality="Mistake", think_time_ms=5000, last_move_was_blunder=False, current_blunder_streak=1
+    ) == (2, False)
+    assert update_mental_signals_after_move(
+        move_quality="Inaccuracy", think_time_ms=900, last_move_was_blunder=True, current_blunder_streak=3
+    ) == (0, True)
+    assert update_mental_signals_after_move(
+        move_quality=None, think_time_ms=None, last_move_was_blunder=True, current_blunder_streak=2
+    ) == (2, False)
@@ -0,0 +1,53 @@
+import chess
+import chess.engine
+
+from app import chess_engine
+from app.agent import _set_tool_ctx, engine_analyze
+
+
+class FakeUCI:
+    """Stands in for a Stockfish process: scripted bot move, counted analyses."""
+
+    def __init__(self):
+        self.analyse_calls = 0
+
+    def configure(self, options):
+        pass
+
+    def play(self, board, limit, info=None):
+        move, reply = chess.Move.from_uci("e7e5"), chess.Move.from_uci("g1f3")
+        score = chess.engine.PovScore(chess.engine.Cp(-20), chess.BLACK)
+        return chess.engine.PlayResult(move, None, info={"score": score, "depth": 15, "pv": [move, reply]})
+
+    def analyse(self, board, limit, multipv=None):
+        self.analyse_calls += 1
+        score = chess.engine.PovScore(chess.engine.Cp(20), board.turn)
+        return [{"score": score, "pv": [next(iter(board.legal_moves))]}] * (multipv or 1)
+
+    def quit(self):
+        pass
+
+
+def test_coach_analysis_reuses_bot_search(monkeypatch):
+    fake = FakeUCI()
+    monkeypatch.setattr(chess.engine.SimpleEngine, "popen_uci", lambda path: fake)
+    monkeypatch.setattr(chess_engine, "find_stockfish_binary", lambda: "stockfish")
+    engine = chess_engine.StockfishEngine(pool_size=1)
+    monkeypatch.setattr(chess_engine, "ENGINE", engine)
+
+    board = chess.Board()
+    board.push_uci("e2e4")
+    board.push(engine.get_bot_move(board, "hard"))
+
+    _set_tool_ctx(
+        board=board,
+        move_list=["e2e4", "e7e5"],
+        player_side="white",
+        bot_difficulty="hard",
+        coach_verbosity=2,
+        signals={},
+    )
+    out = engine_analyze()
+
+    assert fake.analyse_calls == 0
+    assert out == "PV1: eval=20 cp pv=['g1f3']"
@@ -1,24 +1,21 @@
+import asyncio
 import os
-from fastapi.testclient import TestClient
 
-from app.main import app
-
-
-client = TestClient(app)
+from app import main
+from app.agent import fallback_report
 
 
 def _have_openai_key() -> bool:
     return bool(os.getenv("OPENAI_API_KEY", "").strip())
 
 
-def test_illegal_move_rejected():
-    client.post("/api/new_game", json={"side": "white", "bot_difficulty": "easy", "coach_verbosity": 1})
+def test_illegal_move_rejected(client, session):
     r = client.post("/api/move", json={"uci_move": "e2e5", "think_time_ms": 1200, "self_report": "calm"})
     assert r.status_code == 400
     assert "Illegal move" in r.text
 
 
-def test_legal_move_advances_game_and_bot_responds_or_skips_without_llm():
+def test_legal_move_advances_game_and_bot_responds_or_skips_without_llm(client, session):
     """
     This endpoint runs the LangChain agent, which requires OPENAI_API_KEY.
     If the key isn't set, we skip to keep local tests runnable without extra services.
@@ -26,8 +23,6 @@ def test_legal_move_advances_game_and_bot_responds_or_skips_without_llm():
     if not _have_openai_key():
         return
 
-    client.post("/api/new_game", json={"side": "white", "bot_difficulty": "easy", "coach_verbosity": 1})
-
     r = client.post("/api/move", json={"uci_move": "e2e4", "think_time_ms": 1500, "self_report": "focused"})
     assert r.status_code == 200
     data = r.json()
@@ -43,3 +38,36 @@ def test_legal_move_advances_game_and_bot_responds_or_skips_without_llm():
     # Our current response model returns parsed agent_output if parser succeeded.
     # If parser fails, agent_output can be null; that's acceptable.
     assert "state" in data
+
+
+def _stream_kwargs(session):
+    return dict(
+        board=session.board.copy(),
+        move_list=list(session.move_list),
+        player_side=session.player_side,
+        bot_difficulty=session.bot_difficulty,
+        coach_verbosity=session.coach_verbosity,
+        signals={},
+    )
+
+
+def test_streamed_report_dropped_after_newer_move(session, monkeypatch):
+    monkeypatch.setattr(main, "stream_coach_agent", lambda **kw: fallback_report("late"))
+    stale_id = session.move_id
+    session.move_id += 1  # e.g. an undo landed while the coach was streaming
+
+    asyncio.run(main._stream_coach_to_ws(session, stale_id, _stream_kwargs(session)))
+
+    assert session.last_agent_output is None
+
+
+def test_streamed_report_falls_back_when_agent_fails(session, monkeypatch):
+    def boom(**kw):
+        raise RuntimeError("network down")
+
+    monkeypatch.setattr(main, "stream_coach_agent", boom)
+
+    asyncio.run(main._stream_coach_to_ws(session, session.move_id, _stream_kwargs(session)))
+
+    assert session.last_agent_output.coach.bullets == fallback_report().coach.bullets
+    assert "network down" in session.last_agent_output.raw_text
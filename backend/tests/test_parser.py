@@ -0,0 +1,102 @@
+from app.parser import parse_agent_report_text
+
+
+REPORT = """1) Mental State Check
+Observed signals:
+- fast moves
+- undo attempts 2
+Inference: slightly rushed
+10-second micro-reset: breathe
+
+2) Position Snapshot
+Eval: +0.4
+Why:
+- space
+- development
+Immediate threats:
+- Nxf7
+Plans (White):
+- castle
+Plans (Black):
+- ...d5
+- ...Nc6
+
+3) Move Quality
+Label: Mistake
+
+4) Coaching
+Actionable:
+- do a
+- do b
+Short PV: e4 e5
+
+5) Bot Move
+Explain: ok
+"""
+
+
+def test_parse_report_text():
+    out = parse_agent_report_text(REPORT)
+
+    assert out == {
+        "mental": {
+            "observed_signals": ["fast moves", "undo attempts 2"],
+            "inference": "slightly rushed",
+            "micro_reset_tip": "breathe",
+        },
+        "position": {
+            "eval": "+0.4",
+            "why": ["space", "development"],
+            "threats": ["Nxf7"],
+            "plans": {"white": ["castle"], "black": ["...d5", "...Nc6"]},
+        },
+        "coach": {
+            "move_quality": "Mistake",
+            "bullets": ["do a", "do b"],
+            "pv": "e4 e5",
+        },
+    }
+
+
+def test_parse_report_text_requires_core_sections():
+    assert parse_agent_report_text("no headers") is None
+    assert parse_agent_report_text(REPORT.split("4) Coaching")[0]) is None
+
+
+def test_bullets_stop_at_first_non_bullet():
+    text = REPORT.replace("- do b\n", "- do b\nnot a bullet\n- ignored\n")
+    out = parse_agent_report_text(text)
+
+    assert out["coach"]["bullets"] == ["do a", "do b"]
+
+
+def test_markdown_headers_and_value_on_next_line():
+    text = REPORT.replace("1) Mental", "### 1) Mental").replace("Eval: +0.4", "Eval:\n+0.4")
+    out = parse_agent_report_text(text)
+
+    assert out["position"]["eval"] == "+0.4"
+    assert out["mental"]["inference"] == "slightly rushed"
+
+
+def test_markdown_bold_labels():
+    text = REPORT.replace("Why:", "**Why:**").replace("Eval: +0.4", "**Eval:** +0.4")
+    out = parse_agent_report_text(text)
+
+    assert out["position"]["why"] == ["space", "development"]
+    assert out["position"]["eval"] == "+0.4"
+
+
+def test_inline_headers_fall_back_to_search():
+    text = "Report: 1) Mental State Check Inference: ok 2) Position Snapshot Eval: 0 4) Coaching Short PV: e4"
+    out = parse_agent_report_text(text)
+
+    assert out["mental"]["inference"].startswith("ok")
+    assert out["coach"]["pv"] == "e4"
+
+
+def test_label_only_read_from_move_quality_section():
+    text = REPORT.replace("Inference: slightly rushed", "Inference: slightly rushed\nLabel: Blunder")
+    assert parse_agent_report_text(text)["coach"]["move_quality"] == "Mistake"
+
+    inline = "1) Mental State Check Label: Blunder 2) Position Snapshot Eval: 0 3) Move Quality Label: Good 4) Coaching Short PV: e4"
+    assert parse_agent_report_text(inline)["coach"]["move_quality"] == "Good"
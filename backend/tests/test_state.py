@@ -1,12 +1,13 @@
+import chess
+import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 
 from app.main import app
+from app.session import SESSION_COOKIE, SESSIONS, CachedBoard, Session
 
 
-client = TestClient(app)
-
-
-def test_new_game_and_get_state():
+def test_new_game_and_get_state(client):
     # Start a new game
     r = client.post("/api/new_game", json={"side": "white", "bot_difficulty": "easy", "coach_verbosity": 2})
     assert r.status_code == 200
@@ -22,3 +23,97 @@ def test_new_game_and_get_state():
     data2 = r2.json()
     assert data2["state"]["fen"] == data["state"]["fen"]
     assert data2["state"]["move_list"] == []
+
+
+def test_captured_pieces_serialize_as_symbols():
+    session = Session()
+    session.captured_pieces["white"].extend([chess.PAWN, chess.KNIGHT])
+
+    state = session.to_state()
+    assert state.captured_pieces == {"white": ["p", "n"], "black": []}
+
+
+def test_sessions_are_isolated_per_cookie():
+    # Fresh clients on purpose: each needs its own cookie, separate from the shared one
+    a, b = TestClient(app), TestClient(app)
+    a.post("/api/new_game", json={"side": "white", "bot_difficulty": "easy", "coach_verbosity": 2})
+    b.post("/api/new_game", json={"side": "white", "bot_difficulty": "hard", "coach_verbosity": 3})
+
+    assert a.cookies.get(SESSION_COOKIE) != b.cookies.get(SESSION_COOKIE)
+    assert SESSIONS[a.cookies.get(SESSION_COOKIE)].bot_difficulty == "easy"
+    assert SESSIONS[b.cookies.get(SESSION_COOKIE)].bot_difficulty == "hard"
+
+
+def test_ws_without_session_is_refused():
+    # A fresh client has no session cookie yet
+    with pytest.raises(WebSocketDisconnect):
+        with TestClient(app).websocket_connect("/ws/game") as ws:
+            ws.receive_bytes()
+
+
+def test_think_times_keep_recent_window_and_game_mean():
+    session = Session()
+    for ms in range(1, 31):
+        session.record_think_time(ms * 100)
+
+    signals = session.to_state().signals
+    assert signals.recent_think_times == [ms * 100 for ms in range(11, 31)]
+    assert signals.mean_think_ms == 1550
+
+
+def test_cached_board_tracks_push_pop_reset_and_set_fen():
+    # A plain Board replays every step; the cached reads must never go stale
+    board, plain = CachedBoard(), chess.Board()
+
+    def check():
+        assert board.fen() == plain.fen()
+        assert board.outcome() == plain.outcome()
+        assert board.is_game_over() == plain.is_game_over()
+
+    check()
+    # Fool's mate, then take the mating move back
+    for uci in ("f2f3", "e7e5", "g2g4", "d8h4"):
+        board.push_uci(uci)
+        plain.push_uci(uci)
+        check()
+    assert board.outcome().termination == chess.Termination.CHECKMATE
+
+    board.pop()
+    plain.pop()
+    check()
+    assert board.outcome() is None
+
+    stalemate = "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"
+    board.set_fen(stalemate)
+    plain.set_fen(stalemate)
+    check()
+    assert board.outcome().termination == chess.Termination.STALEMATE
+
+    board.reset()
+    plain.reset()
+    check()
+
+
+def test_cached_board_copy_does_not_share_cache():
+    board = CachedBoard()
+    board.fen(), board.outcome()
+
+    copy = board.copy()
+    copy.push_uci("e2e4")
+
+    assert board.fen() == chess.STARTING_FEN
+    assert copy.fen() == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+
+def test_cached_board_fivefold_outcome_keeps_position():
+    # outcome() pops and pushes internally to count repetitions
+    board = CachedBoard()
+    for _ in range(4):
+        for uci in ("g1f3", "g8f6", "f3g1", "f6g8"):
+            board.push_uci(uci)
+    fen = board.fen()
+
+    assert board.outcome().termination == chess.Termination.FIVEFOLD_REPETITION
+    assert board.fen() == fen
+    assert len(board.move_stack) == 16
+    assert board.outcome() is board.outcome()
@@ -0,0 +1,63 @@
+import asyncio
+
+import orjson
+
+from app.ws import WebSocketManager
+
+
+class FakeSocket:
+    def __init__(self, fail=False, on_send=None):
+        self.frames = []
+        self.fail = fail
+        self.on_send = on_send
+
+    async def send_bytes(self, payload):
+        if self.on_send is not None:
+            self.on_send()
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.frames.append(orjson.loads(payload))
+
+
+async def _broadcast_and_flush(manager, *messages):
+    for msg in messages:
+        await manager.broadcast(msg)
+    await manager._flush_task
+
+
+def test_back_to_back_broadcasts_share_one_ordered_frame():
+    manager = WebSocketManager()
+    ws = FakeSocket()
+    manager.active_connections.append(ws)
+
+    asyncio.run(_broadcast_and_flush(manager, {"n": 1}, {"n": 2}, {"n": 3}))
+
+    assert ws.frames == [[{"n": 1}, {"n": 2}, {"n": 3}]]
+    assert manager._flush_task is None
+
+
+def test_failed_socket_is_pruned():
+    manager = WebSocketManager()
+    good, dead = FakeSocket(), FakeSocket(fail=True)
+    manager.active_connections.extend([dead, good])
+
+    asyncio.run(_broadcast_and_flush(manager, {"n": 1}))
+
+    assert manager.active_connections == [good]
+    assert good.frames == [[{"n": 1}]]
+
+
+def test_socket_joining_during_send_is_kept():
+    manager = WebSocketManager()
+    late = FakeSocket()
+    # The live socket's send yields to the loop, where a new client connects
+    live = FakeSocket(on_send=lambda: manager.active_connections.append(late))
+    dead = FakeSocket(fail=True)
+    manager.active_connections.extend([dead, live])
+
+    asyncio.run(_broadcast_and_flush(manager, {"n": 1}))
+
+    assert manager.active_connections == [live, late]
+    # Joined after the batch was addressed, so it only gets later frames
+    assert late.frames == []
@@ -12,6 +12,8 @@ export default function App() {
     const [fen, setFen] = useState(new Chess().fen());
     const [state, setState] = useState<GameState | null>(null);
     const [agentOutput, setAgentOutput] = useState<AgentOutput | null>(null);
+    // Coach text streamed over WS before the parsed report arrives
+    const [coachDraft, setCoachDraft] = useState<string | null>(null);
 
     // Shows “thinking…” so you know it’s processing
     const [busy, setBusy] = useState(false);
@@ -21,30 +23,57 @@ export default function App() {
 
     const wsRef = useRef<WebSocket | null>(null);
     const moveStartTime = useRef<number | null>(null);
+    // Newest move id seen; streamed coaching for older moves is dropped
+    const moveIdRef = useRef(0);
+
+    const applyState = (next: GameState) => {
+        moveIdRef.current = Math.max(moveIdRef.current, next.move_id);
+        setState(next);
+        setFen(next.fen);
+    };
 
     useEffect(() => {
+        let closed = false;
+
+        const onWsMessage = (msg: any) => {
+            if (msg.type === "agent_delta") {
+                if (msg.move_id < moveIdRef.current) return;
+                if (msg.move_id > moveIdRef.current) {
+                    // First chunk for a move this tab hasn't seen yet (e.g. another tab)
+                    moveIdRef.current = msg.move_id;
+                    setCoachDraft(msg.text);
+                } else {
+                    setCoachDraft((d) => (d ?? "") + msg.text);
+                }
+            }
+            if (msg.type === "update") {
+                if (msg.move_id < moveIdRef.current) return;
+                if (msg.state?.fen) applyState(msg.state);
+                if (msg.agent_output) {
+                    setAgentOutput(msg.agent_output);
+                    setCoachDraft(null);
+                }
+            }
+        };
+
         fetchState()
             .then((res) => {
-                setState(res.state);
-                setFen(res.state.fen);
+                applyState(res.state);
                 setAgentOutput(res.agent_output ?? null);
             })
             .catch(() => {
                 // ignore; actions will error with alerts
+            })
+            .finally(() => {
+                // WS optional enhancement; opened after the state fetch so the
+                // session cookie exists for the handshake
+                if (!closed) wsRef.current = connectWS(onWsMessage);
             });
 
-        // WS optional enhancement
-        wsRef.current = connectWS((msg) => {
-            if (msg.type === "update") {
-                if (msg.state?.fen) {
-                    setState(msg.state);
-                    setFen(msg.state.fen);
-                }
-                if (msg.agent_output) setAgentOutput(msg.agent_output);
-            }
-        });
-
-        return () => wsRef.current?.close();
+        return () => {
+            closed = true;
+            wsRef.current?.close();
+        };
     }, []);
 
     const handleUserMove = async (uci: string) => {
@@ -82,16 +111,20 @@ export default function App() {
             moveStartTime.current !== null ? Date.now() - moveStartTime.current : null;
 
         try {
-            const res = await sendMove(uci, thinkTime, state?.signals.self_report);
+            // Stream coaching only when the WS is up to receive it
+            const streaming = wsRef.current?.readyState === WebSocket.OPEN;
+            if (streaming) setCoachDraft("");
+
+            const res = await sendMove(uci, thinkTime, state?.signals.self_report, streaming);
 
             // ✅ Backend authoritative reconciliation (includes bot move + final fen)
-            setState(res.state);
-            setFen(res.state.fen);
-            setAgentOutput(res.agent_output ?? null);
+            applyState(res.state);
+            if (!streaming) setAgentOutput(res.agent_output ?? null);
             setStatus("");
         } catch (e: any) {
             // ✅ Rollback if backend rejects
             setFen(prevFen);
+            setCoachDraft(null);
             setStatus("");
             alert(e?.message ?? "Move failed");
         } finally {
@@ -113,9 +146,9 @@ export default function App() {
             setPlayerSide(side);
             const res = await newGame(side, difficulty, verbosity);
 
-            setState(res.state);
-            setFen(res.state.fen);
+            applyState(res.state);
             setAgentOutput(res.agent_output ?? null);
+            setCoachDraft(null);
             setStatus("");
         } catch (e: any) {
             setStatus("");
@@ -131,9 +164,9 @@ export default function App() {
         setStatus("Undoing…");
         try {
             const res = await undoMove();
-            setState(res.state);
-            setFen(res.state.fen);
+            applyState(res.state);
             setAgentOutput(res.agent_output ?? agentOutput);
+            setCoachDraft(null);
             setStatus("");
         } catch (e: any) {
             setStatus("");
@@ -170,7 +203,7 @@ export default function App() {
                         )
                     }
                 />
-                <TabsPanel agentOutput={agentOutput} />
+                <TabsPanel agentOutput={agentOutput} draft={coachDraft} />
             </div>
         </div>
     );
@@ -1,6 +1,9 @@
 import { GameState, AgentOutput } from "../state/types";
 
-const API_BASE = "http://localhost:8000";
+// Same host the page was loaded from, so the API stays same-site with the page and
+// the SameSite=Lax session cookie is sent (localhost vs 127.0.0.1 count as different sites)
+const API_HOST = `${window.location.hostname}:8000`;
+const API_BASE = `http://${API_HOST}`;
 
 async function jsonOrThrow(r: Response) {
     if (!r.ok) {
@@ -14,7 +17,7 @@ export async function fetchState(): Promise<{
     state: GameState;
     agent_output?: AgentOutput;
 }> {
-    const r = await fetch(`${API_BASE}/api/state`);
+    const r = await fetch(`${API_BASE}/api/state`, { credentials: "include" });
     return jsonOrThrow(r);
 }
 
@@ -25,6 +28,7 @@ export async function newGame(
 ): Promise<{ state: GameState; agent_output?: AgentOutput }> {
     const r = await fetch(`${API_BASE}/api/new_game`, {
         method: "POST",
+        credentials: "include", // session cookie
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
             side,
@@ -38,15 +42,19 @@ export async function newGame(
 export async function sendMove(
     uciMove: string,
     thinkTimeMs: number | null,
-    selfReport?: string | null
+    selfReport?: string | null,
+    streamAgent: boolean = false
 ): Promise<{ state: GameState; agent_output?: AgentOutput }> {
     const r = await fetch(`${API_BASE}/api/move`, {
         method: "POST",
+        credentials: "include", // session cookie
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
             uci_move: uciMove,
             think_time_ms: thinkTimeMs,
             self_report: selfReport ?? null,
+            // coaching then arrives over the WebSocket ("agent_delta" + final "update")
+            stream_agent: streamAgent,
         }),
     });
     return jsonOrThrow(r);
@@ -55,6 +63,7 @@ export async function sendMove(
 export async function undoMove(): Promise<{ state: GameState; agent_output?: AgentOutput }> {
     const r = await fetch(`${API_BASE}/api/undo`, {
         method: "POST",
+        credentials: "include", // session cookie
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({}),
     });
@@ -66,12 +75,19 @@ export async function undoMove(): Promise<{ state: GameState; agent_output?: Age
  * The UI should NOT rely on this for correctness—REST responses update the UI already.
  */
 export function connectWS(onMessage: (data: any) => void): WebSocket {
-    const ws = new WebSocket("ws://localhost:8000/ws/game");
+    const ws = new WebSocket(`ws://${API_HOST}/ws/game`);
+    // Server sends orjson bytes as binary frames
+    ws.binaryType = "arraybuffer";
+    const decoder = new TextDecoder();
 
     ws.onmessage = (evt) => {
         try {
-            const data = JSON.parse(evt.data);
-            onMessage(data);
+            // Server batches messages into one frame as a JSON array
+            const raw = typeof evt.data === "string" ? evt.data : decoder.decode(evt.data);
+            const data = JSON.parse(raw);
+            for (const msg of Array.isArray(data) ? data : [data]) {
+                onMessage(msg);
+            }
         } catch {
             // ignore malformed payloads
         }
@@ -14,13 +14,7 @@ export default function SignalsPanel({ signals, onSelfReportChange }: Props) {
         );
     }
 
-    const avgThinkTime =
-        signals.think_times_ms.length > 0
-            ? Math.round(
-                signals.think_times_ms.reduce((a, b) => a + b, 0) /
-                signals.think_times_ms.length
-            )
-            : null;
+    const avgThinkTime = signals.mean_think_ms ?? null;
 
     return (
         <div className="signals-panel">
@@ -3,13 +3,31 @@ import { AgentOutput } from "../state/types";
 
 interface Props {
     agentOutput: AgentOutput | null;
+    // Raw coach text while the report is still streaming in
+    draft?: string | null;
 }
 
 type TabKey = "coach" | "mental" | "position";
 
-export default function TabsPanel({ agentOutput }: Props) {
+export default function TabsPanel({ agentOutput, draft }: Props) {
     const [activeTab, setActiveTab] = useState<TabKey>("coach");
 
+    if (draft != null) {
+        return (
+            <div className="tabs-panel">
+                {/* Only the coach text streams; the other tabs wait for the parsed report */}
+                <div className="tabs-header">
+                    <button className="active" disabled>Chess Coach</button>
+                    <button disabled>Mental</button>
+                    <button disabled>Position</button>
+                </div>
+                <div className="tab-content draft muted">
+                    {draft || "Coach thinking…"}
+                </div>
+            </div>
+        );
+    }
+
     if (!agentOutput) {
         return (
             <div className="tabs-panel">
@@ -6,7 +6,8 @@ export interface ClockState {
 }
 
 export interface SignalState {
-    think_times_ms: number[];
+    recent_think_times: number[]; // last 20 moves
+    mean_think_ms?: number | null; // whole game
     blunder_streak: number;
     undo_attempts: number;
     rapid_after_blunder: boolean;
@@ -25,6 +26,7 @@ export interface GameState {
     signals: SignalState;
     game_over: boolean;
     result?: string | null;
+    move_id: number; // bumped on every move/undo/new game
 }
 
 // ---------- AGENT OUTPUT ----------